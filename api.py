@@ -1,18 +1,39 @@
 """
 API operations using aiohttp for the WayPoint Discord bot.
 """
+import asyncio
+import time
 import aiohttp
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-import requests
-from config import API_ENDPOINTS, PLAYER_BRIDGE_URL, STEAM_API_KEY
-
+from config import (
+    API_ENDPOINTS, API_ENDPOINT_TTLS, MAP_ROTATION_SLACK, MAP_ROTATION_RETRY,
+    PLAYER_BRIDGE_URL, STEAM_VANITY_URL, HTTP_RECORD_DIR,
+    HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT, HTTP_TOTAL_TIMEOUT, HTTP_CONNECT_TIMEOUT,
+    PLAYER_STATS_TTL, PLAYER_STATS_CACHE_SIZE, STEAM_SUMMARIES_BATCH_SIZE,
+    MOZAMBIQUE_RATE_LIMIT, MOZAMBIQUE_RATE_BURST,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_BASE_BACKOFF, BREAKER_MAX_BACKOFF
+)
+from cache import TTLCache
+from models import PlayerSnapshot
+from replay import Recorder
+from ratelimit import RateLimiter, CircuitBreaker, CircuitOpenError, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from rotation import RotationClock
 
 
 class API:
     """Handles all API operations for fetching Apex Legends data."""
     
-    def __init__(self):
-        """Initialize the API instance."""
+    def __init__(self, db=None):
+        """
+        Initialize the API instance.
+        
+        Args:
+            db (Database, optional): Database used to cache gamertag and vanity lookups
+        """
+        self.db = db
+        self.player_listeners = []
         self.map_data = {}
         self.ltm_data = {}
         self.server_data = {}
@@ -22,78 +43,428 @@ class API:
         self.crossplay_server_data = {}
         self.console_server_data = {}
         self.last_fetch = None
-        self.cache_duration = timedelta(seconds=30)
+        self.responses = {}
+        self.expires_at = {}
+        self.fetched_at = {}
+        self.failed = set()
+        self._inflight = {}
+        self.rotation = RotationClock()
+        self._rotation_task = None
+        self.player_cache = TTLCache(PLAYER_STATS_CACHE_SIZE, PLAYER_STATS_TTL)
+        self.limiter = RateLimiter(MOZAMBIQUE_RATE_LIMIT, MOZAMBIQUE_RATE_BURST)
+        self.breakers = {
+            name: CircuitBreaker(name, BREAKER_FAILURE_THRESHOLD, BREAKER_BASE_BACKOFF, BREAKER_MAX_BACKOFF)
+            for name in (*API_ENDPOINT_TTLS, "bridge", "steam")
+        }
+        self.session = None
+    
+    async def start(self):
+        """
+        Open the shared, connection-pooled HTTP session.
+        Safe to call more than once; an open session is reused.
+        """
+        if self.session is not None and not self.session.closed:
+            return
+        
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        timeout = aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        
+        # Record responses as replay fixtures when HTTP_RECORD_DIR is set
+        response_class = aiohttp.ClientResponse
+        if HTTP_RECORD_DIR:
+            response_class = Recorder(HTTP_RECORD_DIR).response_class()
+            print(f"⏺️ Recording API responses to {HTTP_RECORD_DIR}")
+        
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, response_class=response_class)
+        print("✅ HTTP session opened")
     
-    async def fetch_all_data(self):
+    async def close(self):
+        """Close the shared HTTP session and release pooled connections."""
+        if self._rotation_task is not None:
+            self._rotation_task.cancel()
+            self._rotation_task = None
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            print("✅ HTTP session closed")
+        self.session = None
+    
+    async def _get_session(self):
+        """
+        Get the shared HTTP session, opening it on first use.
+        
+        Returns:
+            aiohttp.ClientSession: The shared session
+        """
+        if self.session is None or self.session.closed:
+            await self.start()
+        return self.session
+    
+    @asynccontextmanager
+    async def _mozambique_get(self, url, endpoint, priority):
+        """
+        GET a Mozambique Here API URL once its circuit breaker and the rate
+        limiter allow it. The response is fed back into both.
+        
+        Args:
+            url (str): Request URL
+            endpoint (str): Endpoint name, used to pick the circuit breaker
+            priority (int): Rate limiter lane (PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND)
+            
+        Yields:
+            aiohttp.ClientResponse: The response
+            
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+        """
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            raise CircuitOpenError(f"{endpoint} endpoint is unavailable; circuit open")
+        
+        await self.limiter.acquire(priority)
+        session = await self._get_session()
+        recorded = False
+        try:
+            async with session.get(url) as resp:
+                self.limiter.observe(resp.status, resp.headers)
+                # A 429 is throttling, not an outage: the limiter has already
+                # slowed down for it, so it counts neither way on the breaker
+                if resp.status >= 500:
+                    breaker.record_failure()
+                elif resp.status != 429:
+                    breaker.record_success()
+                recorded = True
+                yield resp
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if not recorded:
+                breaker.record_failure()
+            raise
+    
+    async def fetch_all_data(self, priority=PRIORITY_INTERACTIVE):
         """
         Fetch and update all API data (predator, map, server).
-        Implements basic caching to avoid excessive API calls.
+        Only endpoints whose cached payload has expired are re-fetched, and
+        those are requested concurrently. Callers that overlap share the
+        refresh already in flight for an endpoint instead of fetching it
+        again. Map rotation data is refreshed by its own timer at each
+        rotation boundary.
+        
+        Args:
+            priority (int): Rate limiter lane for the requests
         """
-        # Check cache
         now = datetime.now()
-        if self.last_fetch and (now - self.last_fetch) < self.cache_duration:
+        stale = [key for key in API_ENDPOINT_TTLS if self._needs_refresh(key, now)]
+        if not stale:
             print("⚡ Using cached API data")
             return
         
-        responses = {}
+        missing = [key for key in stale if key not in self._inflight]
+        if missing:
+            task = asyncio.ensure_future(self._refresh_endpoints(missing, priority))
+            for key in missing:
+                self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget_inflight(missing, t))
         
-        async with aiohttp.ClientSession() as session:
-            for key, url in API_ENDPOINTS.items():
-                try:
-                    async with session.get(url) as resp:
-                        # Try to parse as JSON regardless of content-type
-                        # (some APIs return JSON with text/plain header)
-                        try:
-                            responses[key] = await resp.json(content_type=None)
-                            print(f"✅ Fetched {key} data")
-                        except:
-                            # If JSON parsing fails, it's truly not JSON
-                            text = await resp.text()
-                            content_type = resp.headers.get('Content-Type', '')
-                            print(f"⚠️ {key} returned non-JSON response (type: {content_type})")
-                            print(f"   Response preview: {text[:200]}")
-                            responses[key] = {}  # Use empty dict as fallback
-                except Exception as e:
-                    print(f"❌ Failed to fetch {key} from {url}: {e}")
-                    responses[key] = {}  # Ensure key exists even on error
+        # Shield so one cancelled caller doesn't cancel the shared refresh
+        pending = {self._inflight[key] for key in stale}
+        await asyncio.gather(*(asyncio.shield(task) for task in pending))
+    
+    def _forget_inflight(self, keys, task):
+        """Clear the in-flight markers a finished refresh task owns."""
+        for key in keys:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        # Retrieve the exception even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    def _needs_refresh(self, key, now):
+        """
+        Check whether an endpoint's cached payload should be re-fetched.
+        
+        Args:
+            key (str): Endpoint name
+            now (datetime): Current time
+            
+        Returns:
+            bool: True if the endpoint is missing, expired or failed last time
+        """
+        if key == "map" and self._rotation_task is not None and not self._rotation_task.done():
+            # The rotation timer owns map refreshes while it is scheduled
+            return False
+        return key not in self.expires_at or now >= self.expires_at[key]
+    
+    async def _refresh_endpoints(self, keys, priority):
+        """
+        Concurrently fetch the given endpoints and update the parsed data.
+        
+        Args:
+            keys (list): Endpoint names from API_ENDPOINTS
+            priority (int): Rate limiter lane for the requests
+        """
+        now = datetime.now()
+        results = await asyncio.gather(*(self._fetch_endpoint(key, priority) for key in keys))
+        
+        for key, data in zip(keys, results):
+            if data:
+                if key == "map":
+                    self.rotation.update(data)
+                self.responses[key] = data
+                self.fetched_at[key] = now
+                self.expires_at[key] = now + self._endpoint_ttl(key, data)
+                self.failed.discard(key)
+            else:
+                # Keep serving the last good payload; retry on the next call
+                self.responses.setdefault(key, {})
+                self.expires_at.pop(key, None)
+                self.failed.add(key)
+        
+        if "map" in keys and "map" not in self.failed:
+            self._schedule_rotation_refresh()
         
         # Parse and store data
-        self.map_data = responses.get("map", {})
+        self.map_data = self.responses.get("map", {})
         self.ltm_data = self.map_data.get('ltm', {})
-        self.server_data = responses.get("server", {})
-        self.predator_data = responses.get("predator", {})
+        self.server_data = self.responses.get("server", {})
+        self.predator_data = self.responses.get("predator", {})
         self.predcap_data = self.predator_data.get('RP', {})
         self.matchmaking_server_data = self.server_data.get('EA_novafusion', {})
         self.crossplay_server_data = self.server_data.get('ApexOauth_Crossplay', {})
         self.console_server_data = self.server_data.get('otherPlatforms', {})
         
         self.last_fetch = now
-        print(f"✅ API data updated at {now.strftime('%I:%M:%S %p')}")
+        print(f"✅ API data updated at {now.strftime('%I:%M:%S %p')} ({', '.join(keys)})")
+    
+    async def _fetch_endpoint(self, key, priority):
+        """
+        Fetch a single endpoint from API_ENDPOINTS.
+        
+        Args:
+            key (str): Endpoint name
+            priority (int): Rate limiter lane for the request
+            
+        Returns:
+            dict: Parsed JSON payload, or an empty dict on failure
+        """
+        url = API_ENDPOINTS[key]
+        try:
+            async with self._mozambique_get(url, key, priority) as resp:
+                resp.raise_for_status()
+                # Try to parse as JSON regardless of content-type
+                # (some APIs return JSON with text/plain header)
+                try:
+                    data = await resp.json(content_type=None)
+                    print(f"✅ Fetched {key} data")
+                    return data
+                except:
+                    # If JSON parsing fails, it's truly not JSON
+                    text = await resp.text()
+                    content_type = resp.headers.get('Content-Type', '')
+                    print(f"⚠️ {key} returned non-JSON response (type: {content_type})")
+                    print(f"   Response preview: {text[:200]}")
+                    return {}  # Use empty dict as fallback
+        except CircuitOpenError:
+            print(f"⏸️ Skipping {key} fetch; circuit open")
+            return {}
+        except Exception as e:
+            print(f"❌ Failed to fetch {key} from {url}: {e}")
+            return {}  # Ensure key exists even on error
+    
+    def is_stale(self, key):
+        """
+        Check whether an endpoint's data is being served past a failed refresh.
+        
+        Args:
+            key (str): Endpoint name
+            
+        Returns:
+            bool: True if the latest refresh of this endpoint failed
+        """
+        return key in self.failed
+    
+    def data_age(self, key):
+        """
+        Get the age of an endpoint's last good payload.
+        
+        Args:
+            key (str): Endpoint name
+            
+        Returns:
+            timedelta: Time since the last successful fetch, or None if never fetched
+        """
+        fetched_at = self.fetched_at.get(key)
+        if fetched_at is None:
+            return None
+        return datetime.now() - fetched_at
+    
+    def _endpoint_ttl(self, key, data):
+        """
+        Work out how long a freshly fetched payload stays valid.
+        
+        Map rotation data is valid until the next rotation boundary;
+        everything else uses its configured TTL.
+        
+        Args:
+            key (str): Endpoint name
+            data (dict): Parsed payload
+            
+        Returns:
+            timedelta: Time until the payload should be re-fetched
+        """
+        if key == "map":
+            delay = self._rotation_refresh_delay()
+            if delay is not None:
+                return timedelta(seconds=delay)
+        return timedelta(seconds=API_ENDPOINT_TTLS[key])
+    
+    def _rotation_refresh_delay(self):
+        """
+        Seconds until map rotation data should be re-fetched.
+        
+        Returns:
+            float: Delay until just after the next rotation boundary, or None
+            if the payload carried no rotation timings
+        """
+        boundary = self.rotation.next_boundary()
+        if boundary is None:
+            return None
+        delay = boundary - time.time() + MAP_ROTATION_SLACK
+        if delay < MAP_ROTATION_SLACK:
+            # The API hasn't rotated yet; check back shortly
+            return MAP_ROTATION_RETRY
+        return delay
+    
+    def _schedule_rotation_refresh(self):
+        """Schedule a single map refetch at the next rotation boundary."""
+        if self._rotation_task is not None and self._rotation_task is not asyncio.current_task():
+            self._rotation_task.cancel()
+        self._rotation_task = None
+        
+        delay = self._rotation_refresh_delay()
+        if delay is None:
+            return
+        self._rotation_task = asyncio.create_task(self._refresh_at_boundary(delay))
+    
+    async def _refresh_at_boundary(self, delay):
+        """
+        Wait for a rotation boundary, then refetch map rotation data.
+        
+        Args:
+            delay (float): Seconds to wait
+        """
+        await asyncio.sleep(delay)
+        print("🗺️ Map rotation changed; refreshing rotation data")
+        await self._refresh_endpoints(["map"], PRIORITY_BACKGROUND)
     
-    async def fetch_player_stats(self, apex_uid, platform):
+    async def fetch_player_stats(self, apex_uid, platform, priority=PRIORITY_INTERACTIVE):
         """
-        Fetch player statistics from the API.
+        Fetch player statistics, served from the per-player cache when fresh.
+        Concurrent callers for the same player share one in-flight request.
         
         Args:
             apex_uid (str): Apex Legends UID
             platform (str): Gaming platform (PC, PS4, X1)
+            priority (int): Rate limiter lane used on a cache miss
             
         Returns:
-            dict: Player statistics data
+            PlayerSnapshot: Player statistics, possibly stale if the API is unavailable
             
         Raises:
-            Exception: If API request fails
+            Exception: If API request fails and no earlier data is cached
         """
-        url = f"{PLAYER_BRIDGE_URL}&uid={apex_uid}&platform={platform}"
+        key = (str(apex_uid), platform)
+        try:
+            return await self.player_cache.get_or_fetch(
+                key,
+                lambda: self._request_player_stats(apex_uid, platform, priority)
+            )
+        except Exception:
+            stale = self.player_cache.get_stale(key)
+            if stale is None:
+                raise
+            print(f"⚠️ Serving stale stats for UID {apex_uid}")
+            return stale
+    
+    def add_player_listener(self, listener):
+        """
+        Register a coroutine called with every freshly fetched player.
+        
+        Args:
+            listener: Coroutine function taking (player, platform)
+        """
+        self.player_listeners.append(listener)
+    
+    async def _notify_player(self, player, platform):
+        """
+        Pass a freshly fetched player to every listener.
         
-        async with aiohttp.ClientSession() as session:
+        Args:
+            player (PlayerSnapshot): Parsed player statistics
+            platform (str): Gaming platform (PC, PS4, X1)
+        """
+        for listener in self.player_listeners:
             try:
-                async with session.get(url) as resp:
-                    resp.raise_for_status()
-                    return await resp.json()
+                await listener(player, platform)
             except Exception as e:
-                print(f"❌ Failed to fetch player stats for UID {apex_uid}: {e}")
-                raise
+                print(f"❌ Player listener failed for UID {player.uid}: {e}")
+    
+    def get_cached_player(self, apex_uid, platform):
+        """
+        Get a player's last fetched stats without making a request.
+        
+        Args:
+            apex_uid (str): Apex Legends UID
+            platform (str): Gaming platform (PC, PS4, X1)
+            
+        Returns:
+            PlayerSnapshot: Cached stats (possibly expired), or None if never fetched
+        """
+        return self.player_cache.get_stale((str(apex_uid), platform))
+    
+    def player_data_age(self, apex_uid, platform):
+        """
+        Get the age of a player's cached stats.
+        
+        Args:
+            apex_uid (str): Apex Legends UID
+            platform (str): Gaming platform (PC, PS4, X1)
+            
+        Returns:
+            float: Seconds since the stats were fetched, or None if not cached
+        """
+        return self.player_cache.age((str(apex_uid), platform))
+    
+    async def _request_player_stats(self, apex_uid, platform, priority):
+        """
+        Request player statistics from the /bridge endpoint.
+        
+        Args:
+            apex_uid (str): Apex Legends UID
+            platform (str): Gaming platform (PC, PS4, X1)
+            priority (int): Rate limiter lane for the request
+            
+        Returns:
+            PlayerSnapshot: Parsed player statistics
+            
+        Raises:
+            Exception: If API request fails or the response has no player data
+        """
+        url = f"{PLAYER_BRIDGE_URL}&uid={apex_uid}&platform={platform}"
+        
+        try:
+            async with self._mozambique_get(url, "bridge", priority) as resp:
+                resp.raise_for_status()
+                player = PlayerSnapshot.from_bridge(await resp.json())
+        except Exception as e:
+            print(f"❌ Failed to fetch player stats for UID {apex_uid}: {e}")
+            raise
+        
+        await self._notify_player(player, platform)
+        return player
     
     async def get_apex_uid(self, gamertag, platform):
         """
@@ -109,17 +480,29 @@ class API:
         Raises:
             Exception: If API request fails or UID not found
         """
+        lookup_key = f"{platform}:{gamertag.lower()}"
+        if self.db is not None:
+            apex_uid = await self.db.get_resolution("apex_uid", lookup_key)
+            if apex_uid is not None:
+                return apex_uid
+        
         url = f"{PLAYER_BRIDGE_URL}&player={gamertag}&platform={platform}"
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-                    return data['global']['uid']
-            except Exception as e:
-                print(f"❌ Failed to get UID for gamertag {gamertag}: {e}")
-                raise
+        try:
+            async with self._mozambique_get(url, "bridge", PRIORITY_INTERACTIVE) as resp:
+                resp.raise_for_status()
+                player = PlayerSnapshot.from_bridge(await resp.json())
+                apex_uid = player.uid
+        except Exception as e:
+            print(f"❌ Failed to get UID for gamertag {gamertag}: {e}")
+            raise
+        
+        # The lookup returns full stats, so seed the player cache with them
+        self.player_cache.set((apex_uid, platform), player)
+        await self._notify_player(player, platform)
+        if self.db is not None:
+            await self.db.save_resolution("apex_uid", lookup_key, apex_uid)
+        return apex_uid
     
     def get_predcap_value(self, platform):
         """
@@ -139,71 +522,113 @@ class API:
             return self.predcap_data['PS4']['val']
         return 0
 
-def get_player_game(player_id):
-    url= API_ENDPOINTS['steam_game'].format(steam_id=player_id)
-    response = requests.get(url)
-    data = response.json()
-    player_game_id=data['response']['players'][0].get('gameid')
-    return player_game_id
-
+    async def get_player_games_async(self, steam_ids):
+        """
+        Get the currently-running gameid for many Steam players at once.
+        
+        IDs are sent to GetPlayerSummaries in batches of up to 100, with all
+        batches requested concurrently.
+        
+        Args:
+            steam_ids (iterable): SteamID64 strings
+            
+        Returns:
+            dict: steamid -> gameid (or None if not in-game). IDs from a batch
+            that failed are left out so callers can tell "unknown" from "offline".
+        """
+        unique_ids = list(dict.fromkeys(str(steam_id) for steam_id in steam_ids))
+        batches = [
+            unique_ids[i:i + STEAM_SUMMARIES_BATCH_SIZE]
+            for i in range(0, len(unique_ids), STEAM_SUMMARIES_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(self._fetch_player_games_batch(batch) for batch in batches))
+        
+        games = {}
+        for result in results:
+            games.update(result)
+        return games
     
-async def get_player_game_async(player_id):
-    """
-    Async wrapper to get the currently-running gameid for a Steam player.
-    Returns the `gameid` (string) or None if not in-game / on error.
-    """
-    url = API_ENDPOINTS['steam_game'].format(steam_id=player_id)
-    async with aiohttp.ClientSession() as session:
+    async def _fetch_player_games_batch(self, steam_ids):
+        """
+        Fetch gameids for a single batch of Steam players.
+        
+        Args:
+            steam_ids (list): Up to 100 SteamID64 strings
+            
+        Returns:
+            dict: steamid -> gameid (or None), empty on failure
+        """
+        breaker = self.breakers["steam"]
+        if not breaker.allow():
+            print(f"⏸️ Skipping Steam lookup for {len(steam_ids)} players; circuit open")
+            return {}
+        
+        url = API_ENDPOINTS['steam_game'].format(steam_id=",".join(steam_ids))
+        session = await self._get_session()
         try:
             async with session.get(url) as resp:
+                resp.raise_for_status()
                 try:
                     data = await resp.json(content_type=None)
                 except Exception:
                     text = await resp.text()
                     print(f"⚠️ Non-JSON Steam response: {text[:200]}")
-                    return None
-                players = data.get('response', {}).get('players', [])
-                if not players:
-                    return None
-                return players[0].get('gameid')
+                    breaker.record_failure()
+                    return {}
         except Exception as e:
-            print(f"❌ Failed to fetch Steam player data for {player_id}: {e}")
-            return None
-
+            print(f"❌ Failed to fetch Steam player data for {len(steam_ids)} players: {e}")
+            breaker.record_failure()
+            return {}
+        breaker.record_success()
+        
+        # Players missing from the response (private/invalid) count as not in-game
+        games = dict.fromkeys(steam_ids)
+        for player in data.get('response', {}).get('players', []):
+            games[str(player.get('steamid'))] = player.get('gameid')
+        return games
 
-async def resolve_vanity_async(vanity):
-    """
-    Resolve a Steam vanity URL to a SteamID64 using the Steam Web API.
-    Returns the SteamID64 string or None on failure.
-    """
-    url = f"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/?key={STEAM_API_KEY}&vanityurl={vanity}"
-    async with aiohttp.ClientSession() as session:
+    async def resolve_vanity_async(self, vanity):
+        """
+        Resolve a Steam vanity URL to a SteamID64 using the Steam Web API.
+        Returns the SteamID64 string or None on failure.
+        """
+        lookup_key = vanity.lower()
+        if self.db is not None:
+            steam_id = await self.db.get_resolution("steam_vanity", lookup_key)
+            if steam_id is not None:
+                return steam_id
+        
+        url = STEAM_VANITY_URL.format(vanity=vanity)
+        session = await self._get_session()
         try:
             async with session.get(url) as resp:
                 data = await resp.json(content_type=None)
                 response = data.get('response', {})
-                if response.get('success') == 1:
-                    return response.get('steamid')
-                return None
+                if response.get('success') != 1:
+                    return None
+                steam_id = response.get('steamid')
         except Exception as e:
             print(f"❌ Failed to resolve vanity URL {vanity}: {e}")
             return None
+        
+        if self.db is not None and steam_id:
+            await self.db.save_resolution("steam_vanity", lookup_key, steam_id)
+        return steam_id
 
+    async def get_steam_player_async(self, steam_identifier):
+        """
+        Get Steam player summary for a SteamID64 or vanity name.
+        Returns the player dict from GetPlayerSummaries or None.
+        """
+        # If identifier isn't numeric, try to resolve as vanity
+        steam_id = steam_identifier
+        if not str(steam_identifier).isdigit():
+            steam_id = await self.resolve_vanity_async(steam_identifier)
+            if steam_id is None:
+                return None
 
-async def get_steam_player_async(steam_identifier):
-    """
-    Get Steam player summary for a SteamID64 or vanity name.
-    Returns the player dict from GetPlayerSummaries or None.
-    """
-    # If identifier isn't numeric, try to resolve as vanity
-    steam_id = steam_identifier
-    if not str(steam_identifier).isdigit():
-        steam_id = await resolve_vanity_async(steam_identifier)
-        if steam_id is None:
-            return None
-
-    url = f"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/?key={STEAM_API_KEY}&steamids={steam_id}"
-    async with aiohttp.ClientSession() as session:
+        url = API_ENDPOINTS['steam_game'].format(steam_id=steam_id)
+        session = await self._get_session()
         try:
             async with session.get(url) as resp:
                 data = await resp.json(content_type=None)
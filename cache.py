@@ -0,0 +1,152 @@
+"""
+In-process caching helpers for the WayPoint Discord bot.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    Concurrent loads of the same key are coalesced: the first caller runs the
+    fetch and every other caller awaits that same in-flight request.
+    """
+
+    def __init__(self, maxsize, ttl):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before evicting the least recently used
+            ttl (float): Seconds an entry stays fresh
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Get a fresh cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+            The cached value, or default
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, stored_at, value = entry
+        if time.monotonic() >= expires_at:
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key, default=None):
+        """
+        Get a cached value even if it has expired.
+
+        Expired entries are kept until LRU eviction so they can be served
+        while the upstream source is unavailable.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key was never cached
+
+        Returns:
+            The cached value, or default
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        return entry[2]
+
+    def age(self, key):
+        """
+        Seconds since a key was last stored.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            float: Age in seconds, or None if the key is not cached
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[1]
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        now = time.monotonic()
+        self._entries[key] = (now + self.ttl, now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop a single key from the cache."""
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Get a value from the cache, loading it with `fetch` on a miss.
+
+        Args:
+            key: Cache key
+            fetch: Zero-argument coroutine function that loads the value
+
+        Returns:
+            The cached or freshly loaded value
+
+        Raises:
+            Exception: Whatever `fetch` raised; failures are not cached
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(key, fetch))
+            # Retrieve the exception even if every waiter was cancelled
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled caller doesn't cancel the shared request
+        return await asyncio.shield(future)
+
+    async def _load(self, key, fetch):
+        """Run `fetch`, cache its result and clear the in-flight marker."""
+        try:
+            value = await fetch()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
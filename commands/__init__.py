@@ -4,7 +4,7 @@ Command setup orchestration for the WayPoint Discord bot.
 from commands import user_commands, admin_commands
 
 
-async def setup_all_commands(bot, db, api):
+async def setup_all_commands(bot, db, api, edits):
     """
     Set up all bot commands (user and admin).
     
@@ -12,7 +12,8 @@ async def setup_all_commands(bot, db, api):
         bot: Discord bot instance
         db: Database instance
         api: API instance
+        edits: EditQueue instance
     """
-    await user_commands.setup(bot, db, api)
-    await admin_commands.setup(bot, db, api)
+    await user_commands.setup(bot, db, api, edits)
+    await admin_commands.setup(bot, db, api, edits)
     print("✅ All commands registered")
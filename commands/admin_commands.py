@@ -1,20 +1,25 @@
 """
 Admin commands for the WayPoint Discord bot.
 """
+import os
+import shutil
+import tempfile
 import discord
 from discord import app_commands
 from datetime import datetime
-from config import ADMIN_ROLE, TIMEZONE_ET
-from embeds import create_server_status_embed
+from config import ADMIN_ROLE, TIMEZONE_ET, EXPORT_DIR, DISCORD_UPLOAD_BYTES
+from embeds import create_server_status_embed, create_api_metrics_embed, embed_fingerprint
+from export import export_dataset
 
 
 # Module-level variables (will be set by setup)
 bot = None
 db = None
 api = None
+edits = None
 
 
-async def setup(bot_instance, db_instance, api_instance):
+async def setup(bot_instance, db_instance, api_instance, edits_instance):
     """
     Register all admin commands with the bot.
     
@@ -22,14 +27,19 @@ async def setup(bot_instance, db_instance, api_instance):
         bot_instance: Discord bot instance
         db_instance: Database instance
         api_instance: API instance
+        edits_instance: EditQueue instance
     """
-    global bot, db, api
+    global bot, db, api, edits
     bot = bot_instance
     db = db_instance
     api = api_instance
+    edits = edits_instance
     
     # Register commands
     bot.tree.add_command(apex_status)
+    bot.tree.add_command(api_metrics)
+    bot.tree.add_command(backup)
+    bot.tree.add_command(export)
     
     print("✅ Admin commands registered")
 
@@ -53,7 +63,7 @@ async def apex_status(interaction: discord.Interaction):
     
     # Get existing server config
     server = await db.get_server(interaction.guild.id)
-    apex_server_message_id = server[2] if server else None
+    apex_server_message_id = server.apex_server_message_id if server else None
     
     # Save channel configuration
     await db.save_server_config(
@@ -77,19 +87,29 @@ async def apex_status(interaction: discord.Interaction):
     server_embed = create_server_status_embed(formatted_time, api)
     
     # Check if a message already exists and edit it, otherwise send a new one
+    edited = False
     if apex_server_message_id:
         try:
-            message = await channel.fetch_message(apex_server_message_id)
-            await message.edit(embed=server_embed)
+            edited = await edits.edit(
+                channel.id,
+                apex_server_message_id,
+                server_embed,
+                embed_fingerprint(server_embed),
+                label=f"server status message for server {interaction.guild.id}"
+            )
         except discord.NotFound:
-            message = await channel.send(embed=server_embed)
+            pass
+    if edited:
+        message_id = apex_server_message_id
     else:
         message = await channel.send(embed=server_embed)
+        message_id = message.id
+        db.record_embed_fingerprint(message_id, embed_fingerprint(server_embed))
     
     # Update the database with the new message ID
     await db.save_server_config(
         discord_server_id=interaction.guild.id,
-        apex_server_message_id=message.id
+        apex_server_message_id=message_id
     )
     
     # Send success message at the end
@@ -101,3 +121,124 @@ async def apex_status(interaction: discord.Interaction):
     except discord.errors.NotFound:
         # Interaction expired, but the operation still completed successfully
         pass
+
+
+@app_commands.command(name="api_metrics", description="Shows API rate limiter queue depth, wait times and circuit state")
+@app_commands.checks.has_role(ADMIN_ROLE)
+async def api_metrics(interaction: discord.Interaction):
+    """
+    Show outbound API rate limiter, circuit breaker and cache metrics.
+    
+    Args:
+        interaction: Discord interaction
+    """
+    now_et = datetime.now(TIMEZONE_ET)
+    formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
+    await interaction.response.send_message(embed=create_api_metrics_embed(formatted_time, api, edits), ephemeral=True)
+
+
+@app_commands.command(name="backup", description="Takes an online backup of the bot database")
+@app_commands.checks.has_role(ADMIN_ROLE)
+async def backup(interaction: discord.Interaction):
+    """
+    Take an online database backup now.
+    
+    Args:
+        interaction: Discord interaction
+    """
+    await interaction.response.defer(ephemeral=True)
+    
+    try:
+        path = await db.backup()
+    except Exception as e:
+        await interaction.followup.send(f"❌ Backup failed: {e}", ephemeral=True)
+        return
+    
+    await interaction.followup.send(f"✅ Database backed up to `{path}`", ephemeral=True)
+
+
+@app_commands.command(name="export", description="Exports registrations or RP history as CSV/NDJSON")
+@app_commands.checks.has_role(ADMIN_ROLE)
+@app_commands.describe(
+    dataset="Which table to export",
+    format="CSV for spreadsheets, NDJSON for scripts",
+    compress="Gzip each file",
+    destination="Attach the files here, or write them to the bot's export folder"
+)
+@app_commands.choices(
+    dataset=[
+        app_commands.Choice(name="Users", value="users"),
+        app_commands.Choice(name="Server memberships", value="memberships"),
+        app_commands.Choice(name="RP history", value="rp_history")
+    ],
+    format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="NDJSON", value="ndjson")
+    ],
+    destination=[
+        app_commands.Choice(name="Attachment", value="attach"),
+        app_commands.Choice(name="Disk", value="disk")
+    ]
+)
+async def export(
+    interaction: discord.Interaction,
+    dataset: app_commands.Choice[str],
+    format: app_commands.Choice[str] = None,
+    compress: bool = False,
+    destination: app_commands.Choice[str] = None
+):
+    """
+    Stream a table out of the database into chunked files.
+    
+    Args:
+        interaction: Discord interaction
+        dataset: users, memberships or rp_history
+        format: csv (default) or ndjson
+        compress: Gzip each file
+        destination: attach (default) or disk
+    """
+    await interaction.response.defer(ephemeral=True)
+    
+    fmt = format.value if format else "csv"
+    to_disk = destination is not None and destination.value == "disk"
+    directory = EXPORT_DIR if to_disk else tempfile.mkdtemp(prefix="waypoint-export-")
+    
+    try:
+        paths, rows = await export_dataset(db, dataset.value, fmt, compress, directory)
+        
+        if to_disk:
+            await interaction.followup.send(
+                f"✅ Exported {rows} rows to {len(paths)} file(s) in `{directory}`",
+                ephemeral=True
+            )
+            return
+        
+        # Discord caps both the attachment count and their total size per message,
+        # so group parts into messages that stay under both limits
+        batches = []
+        batch_bytes = 0
+        for path in paths:
+            size = os.path.getsize(path)
+            if not batches or len(batches[-1]) == 10 or batch_bytes + size > DISCORD_UPLOAD_BYTES:
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append(path)
+            batch_bytes += size
+        
+        for index, batch in enumerate(batches):
+            files = [discord.File(path, filename=os.path.basename(path)) for path in batch]
+            try:
+                await interaction.followup.send(
+                    f"✅ Exported {rows} {dataset.name.lower()} rows" if index == 0 else None,
+                    files=files,
+                    ephemeral=True
+                )
+            finally:
+                for file in files:
+                    file.close()
+    except Exception as e:
+        await interaction.followup.send(f"❌ Export failed: {e}", ephemeral=True)
+    finally:
+        if not to_disk:
+            shutil.rmtree(directory, ignore_errors=True)
+
@@ -4,10 +4,9 @@ User-facing commands for the WayPoint Discord bot.
 import discord
 from discord import app_commands
 from datetime import datetime
-from config import TIMEZONE_ET, ADMIN_ROLE
-from embeds import create_player_stats_embed, create_admin_stats_embed
+from config import TIMEZONE_ET, ADMIN_ROLE, LEADERBOARD_SIZE, LEADERBOARD_RADIUS
+from embeds import create_player_stats_embed, create_admin_stats_embed, create_leaderboard_embed, embed_fingerprint
 from utils import format_time_difference, format_rp_per_hour
-from api import get_steam_player_async
 
 
 
@@ -15,9 +14,10 @@ from api import get_steam_player_async
 bot = None
 db = None
 api = None
+edits = None
 
 
-async def setup(bot_instance, db_instance, api_instance):
+async def setup(bot_instance, db_instance, api_instance, edits_instance):
     """
     Register all user commands with the bot.
     
@@ -25,17 +25,20 @@ async def setup(bot_instance, db_instance, api_instance):
         bot_instance: Discord bot instance
         db_instance: Database instance
         api_instance: API instance
+        edits_instance: EditQueue instance
     """
-    global bot, db, api
+    global bot, db, api, edits
     bot = bot_instance
     db = db_instance
     api = api_instance
+    edits = edits_instance
     
     # Register commands
     bot.tree.add_command(register_user)
     bot.tree.add_command(stats)
     bot.tree.add_command(track)
     bot.tree.add_command(setsteam)
+    bot.tree.add_command(leaderboard)
     
     print("✅ User commands registered")
 
@@ -60,6 +63,11 @@ async def register_user(interaction: discord.Interaction, gamertag: str, platfor
         # Save user to database
         await db.save_user(discord_id, discord_server_id, apex_uid, platform, 0)
         
+        # Seed the leaderboard from the lookup that just resolved the UID
+        player = api.get_cached_player(apex_uid, platform)
+        if player is not None:
+            await db.record_leaderboard_rp(player, platform)
+        
         await interaction.response.send_message(
             f"✅ Your Apex UID `{apex_uid}` and platform `{platform}` have been registered!",
             ephemeral=True
@@ -92,15 +100,12 @@ async def stats(interaction: discord.Interaction):
         )
         return
     
-    # Unpack user data (support legacy and extended schemas)
-    discord_id = user[0]
-    discord_server_id = user[1] if len(user) > 1 else None
-    apex_uid = user[2] if len(user) > 2 else None
-    platform = user[3] if len(user) > 3 else None
-    current_RP = user[4] if len(user) > 4 else None
-    time_registered = user[5] if len(user) > 5 else None
-    stats_message_id = user[6] if len(user) > 6 else None
-    stats_channel_id = user[7] if len(user) > 7 else None
+    apex_uid = user.apex_uid
+    platform = user.platform
+    
+    # Stats messages are tracked per guild
+    membership = db.get_membership(discord_id, interaction.guild.id)
+    stats_message_id = membership.stats_message_id if membership else None
     
     # Acknowledge the interaction immediately
     await interaction.response.send_message("🔄 Updating your stats...", ephemeral=True, delete_after=2)
@@ -119,21 +124,32 @@ async def stats(interaction: discord.Interaction):
         await interaction.followup.send(f"❌ Failed to create stats embed: {e}", ephemeral=True)
         return
     
+    fingerprint = embed_fingerprint(stats_embed)
+    
     try:
+        edited = False
         if stats_message_id:
-            # If a stats message already exists, fetch and edit it
+            # If a stats message already exists, edit it through the edit queue,
+            # ahead of any background edits waiting for this channel
             try:
-                stats_message = await stats_channel.fetch_message(stats_message_id)
-                await stats_message.edit(embed=stats_embed)
+                edited = await edits.edit(
+                    stats_channel.id,
+                    stats_message_id,
+                    stats_embed,
+                    fingerprint,
+                    label=f"stats message for user {discord_id} in server {interaction.guild.id}"
+                )
             except discord.NotFound:
-                # If the message is not found, send a new one
-                stats_message = await stats_channel.send(embed=stats_embed)
-        else:
-            # If no stats message exists, send a new one
+                pass
+        
+        if not edited:
+            # If no stats message exists or it was deleted, send a new one
             stats_message = await stats_channel.send(embed=stats_embed)
+            stats_message_id = stats_message.id
+            db.record_embed_fingerprint(stats_message_id, fingerprint)
         
         # Update the database with the new message and channel IDs
-        await db.update_user_stats_message(discord_id, stats_message.id, stats_channel.id)
+        await db.update_user_stats_message(discord_id, interaction.guild.id, stats_message_id, stats_channel.id)
     
     except discord.Forbidden:
         await interaction.followup.send("❌ Bot lacks permissions to send messages in this channel.", ephemeral=True)
@@ -162,19 +178,15 @@ async def track(interaction: discord.Interaction):
         )
         return
 
-    discord_id = user[0]
-    discord_server_id = user[1] if len(user) > 1 else None
-    apex_uid = user[2] if len(user) > 2 else None
-    platform = user[3] if len(user) > 3 else None
-    current_RP = user[4] if len(user) > 4 else None
-    time_registered = user[5] if len(user) > 5 else None
-    stats_message_id = user[6] if len(user) > 6 else None
-    stats_channel_id = user[7] if len(user) > 7 else None
+    apex_uid = user.apex_uid
+    platform = user.platform
+    current_RP = user.current_RP
+    time_registered = user.time_registered
 
     # Fetch current RP from API
     try:
-        player_data = await api.fetch_player_stats(apex_uid, platform)
-        apex_rp = int(player_data["global"]["rank"]["rankScore"])
+        player = await api.fetch_player_stats(apex_uid, platform)
+        apex_rp = player.rank_score
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to fetch RP from API: {e}", ephemeral=True)
         return
@@ -190,7 +202,7 @@ async def track(interaction: discord.Interaction):
                     ephemeral=True,
                 )
                 # Reset tracking state to something sane
-                await db.update_user_tracking(discord_id, apex_rp, None)
+                await db.update_user_tracking(discord_id, apex_rp, None, flush=True)
                 return
         else:
             start_time = time_registered
@@ -201,7 +213,7 @@ async def track(interaction: discord.Interaction):
         avg_rp_per_hour = format_rp_per_hour(rp_change, start_time, end_time)
 
         # Update current RP and clear tracking start time
-        await db.update_user_tracking(discord_id, apex_rp, None)
+        await db.update_user_tracking(discord_id, apex_rp, None, flush=True)
 
         if current_RP is None:
             await interaction.response.send_message(
@@ -229,7 +241,7 @@ async def track(interaction: discord.Interaction):
         return
 
     # Otherwise, tracking is inactive -> start tracking
-    await db.update_user_tracking(discord_id, apex_rp, datetime.now(TIMEZONE_ET))
+    await db.update_user_tracking(discord_id, apex_rp, datetime.now(TIMEZONE_ET), flush=True)
     await interaction.response.send_message(f"✅ Tracking started — current RP: {apex_rp}", ephemeral=True)
 
 
@@ -245,8 +257,7 @@ async def getsteam(interaction: discord.Interaction):
         await interaction.response.send_message("❌ You are not registered. Use /register first.", ephemeral=True)
         return
 
-    # safe unpack
-    steam_id = user[8] if len(user) > 8 else None
+    steam_id = user.steam_id
 
     if not steam_id:
         await interaction.response.send_message("❌ No Steam ID saved. Set one with /setsteam.", ephemeral=True)
@@ -255,7 +266,7 @@ async def getsteam(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
 
     try:
-        player = await get_steam_player_async(steam_id)
+        player = await api.get_steam_player_async(steam_id)
     except Exception:
         player = None
 
@@ -291,7 +302,7 @@ async def setsteam(interaction: discord.Interaction, steamid: str):
 
     # Validate via Steam API (accepts SteamID64 or vanity)
     try:
-        player = await get_steam_player_async(steamid)
+        player = await api.get_steam_player_async(steamid)
     except Exception as e:
         player = None
 
@@ -310,3 +321,40 @@ async def setsteam(interaction: discord.Interaction, steamid: str):
             await interaction.followup.send("❌ Failed to save Steam ID (user not found in database).", ephemeral=True)
     except Exception as e:
         await interaction.followup.send(f"❌ Failed to save Steam ID: {e}", ephemeral=True)
+
+
+@app_commands.command(name="leaderboard", description="Shows this server's RP leaderboard")
+@app_commands.describe(view="Top players, or the players ranked around you")
+@app_commands.choices(view=[
+    app_commands.Choice(name="Top", value="top"),
+    app_commands.Choice(name="Around me", value="around")
+])
+async def leaderboard(interaction: discord.Interaction, view: app_commands.Choice[str] = None):
+    """
+    Show the server's RP standings from the in-memory leaderboard.
+    
+    Args:
+        interaction: Discord interaction
+        view: "top" (default) or "around" the calling user
+    """
+    discord_server_id = interaction.guild.id
+    discord_id = interaction.user.id
+    total = db.leaderboard.size(discord_server_id)
+    
+    if view is not None and view.value == "around":
+        rows = db.leaderboard.around(discord_server_id, discord_id, LEADERBOARD_RADIUS)
+        if not rows:
+            await interaction.response.send_message(
+                "❌ You don't have any RP recorded in this server yet. Use /register or /stats first.",
+                ephemeral=True
+            )
+            return
+        title = "Around you"
+    else:
+        rows = db.leaderboard.top(discord_server_id, LEADERBOARD_SIZE)
+        title = f"Top {LEADERBOARD_SIZE}"
+    
+    now_et = datetime.now(TIMEZONE_ET)
+    formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
+    embed = create_leaderboard_embed(interaction.guild.name, rows, total, formatted_time, discord_id, title)
+    await interaction.response.send_message(embed=embed)
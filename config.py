@@ -13,16 +13,58 @@ DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 APEX_API_KEY = os.getenv('APEX_API_KEY')
 STEAM_API_KEY = os.getenv('STEAM_API_KEY')
 
+# API hosts (override to point the bot at a local stand-in server, see replay.py)
+MOZAMBIQUE_BASE_URL = os.getenv('MOZAMBIQUE_BASE_URL', 'https://api.mozambiquehe.re')
+STEAM_BASE_URL = os.getenv('STEAM_BASE_URL', 'https://api.steampowered.com')
+
+# When set, every API response is saved to this directory as a replay fixture
+HTTP_RECORD_DIR = os.getenv('HTTP_RECORD_DIR')
+
 # API endpoints
 API_ENDPOINTS = {
-    "predator": f"https://api.mozambiquehe.re/predator?auth={APEX_API_KEY}",
-    "map": f"https://api.mozambiquehe.re/maprotation?auth={APEX_API_KEY}&version=2",
-    "server": f"https://api.mozambiquehe.re/servers?auth={APEX_API_KEY}&version=2",
-    "steam_game": f"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/?key={STEAM_API_KEY}&steamids={{steam_id}}"
+    "predator": f"{MOZAMBIQUE_BASE_URL}/predator?auth={APEX_API_KEY}",
+    "map": f"{MOZAMBIQUE_BASE_URL}/maprotation?auth={APEX_API_KEY}&version=2",
+    "server": f"{MOZAMBIQUE_BASE_URL}/servers?auth={APEX_API_KEY}&version=2",
+    "steam_game": f"{STEAM_BASE_URL}/ISteamUser/GetPlayerSummaries/v2/?key={STEAM_API_KEY}&steamids={{steam_id}}"
 }
 
 # API URL templates
-PLAYER_BRIDGE_URL = f"https://api.mozambiquehe.re/bridge?auth={APEX_API_KEY}"
+PLAYER_BRIDGE_URL = f"{MOZAMBIQUE_BASE_URL}/bridge?auth={APEX_API_KEY}"
+# Freshness policy (seconds) for each endpoint refreshed by fetch_all_data.
+# "map" is refreshed at the next rotation boundary; this value is only used
+# when the payload carries no rotation timers.
+API_ENDPOINT_TTLS = {
+    "predator": 900,
+    "map": 300,
+    "server": 60
+}
+MAP_ROTATION_SLACK = 5  # Seconds to wait past a rotation boundary before refetching
+MAP_ROTATION_RETRY = 30  # Seconds before refetching if the API hasn't rotated yet
+
+# Mozambique Here API rate limit (token bucket)
+MOZAMBIQUE_RATE_LIMIT = 2.0       # Requests per second
+MOZAMBIQUE_RATE_BURST = 2         # Requests allowed back-to-back
+
+# Circuit breakers for outbound API endpoints
+BREAKER_FAILURE_THRESHOLD = 3     # Consecutive failures before an endpoint is paused
+BREAKER_BASE_BACKOFF = 30         # Seconds to pause after the first trip
+BREAKER_MAX_BACKOFF = 900         # Longest pause between half-open probes
+
+# Per-player /bridge response cache
+PLAYER_STATS_TTL = 45             # Seconds a player's stats are reused
+PLAYER_STATS_CACHE_SIZE = 1000    # Max players kept before LRU eviction
+
+STEAM_SUMMARIES_BATCH_SIZE = 100  # Max steamids per GetPlayerSummaries call
+
+STEAM_VANITY_URL = f"{STEAM_BASE_URL}/ISteamUser/ResolveVanityURL/v1/?key={STEAM_API_KEY}&vanityurl={{vanity}}"
+
+# HTTP client configuration (shared aiohttp session)
+HTTP_POOL_LIMIT = 20               # Max open connections across all hosts
+HTTP_POOL_LIMIT_PER_HOST = 8       # Max open connections to a single host
+HTTP_DNS_CACHE_TTL = 300           # Seconds to cache DNS lookups
+HTTP_KEEPALIVE_TIMEOUT = 60        # Seconds to keep idle connections open
+HTTP_TOTAL_TIMEOUT = 15            # Seconds allowed for a whole request
+HTTP_CONNECT_TIMEOUT = 5           # Seconds allowed to establish a connection
 
 # Discord bot configuration
 ADMIN_ROLE = "Admin"
@@ -32,3 +74,39 @@ TIMEZONE_ET = ZoneInfo("America/New_York")
 
 # Database configuration
 DB_PATH = "server.db"
+DB_CACHE_SIZE_KB = 8192     # SQLite page cache size
+DB_BUSY_TIMEOUT_MS = 5000   # How long to wait on a locked database
+DB_WRITE_BATCH_WINDOW = 0.25  # Seconds to coalesce per-user updates into one commit
+RESOLUTION_TTL_DAYS = 30  # How long gamertag/vanity lookups are trusted
+RP_HISTORY_RAW_DAYS = 7      # Keep every RP change for this long
+RP_HISTORY_HOURLY_DAYS = 90  # Then one point per hour until this age, one per day after
+
+# /leaderboard
+LEADERBOARD_SIZE = 10     # Rows shown in the top view
+LEADERBOARD_RADIUS = 3    # Rows shown above and below you in the around-me view
+
+# Online database backups (SQLite backup API, gzip-compressed)
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL_HOURS = 24    # How often the scheduled backup runs
+BACKUP_KEEP = 7               # Number of snapshots kept before the oldest is deleted
+BACKUP_PAGES_PER_STEP = 64    # Database pages copied per backup step
+BACKUP_STEP_SLEEP = 0.05      # Seconds paused after each step so the backup doesn't monopolize disk I/O
+
+# Streaming CSV/NDJSON export (/export)
+EXPORT_DIR = os.getenv('EXPORT_DIR', 'exports')
+EXPORT_BATCH_SIZE = 500                 # Rows fetched from SQLite per batch
+EXPORT_CHUNK_BYTES = 8 * 1024 * 1024    # Start a new file past this size (stays under Discord's upload limit)
+DISCORD_UPLOAD_BYTES = 10 * 1024 * 1024  # Total attachment size Discord accepts in one message
+
+# Per-minute stats loop
+STATS_UPDATE_CONCURRENCY = 8   # Players rendered/edited at once
+STATS_UPDATE_TIMEOUT = 20      # Seconds one player's update may take before it is abandoned
+
+# Discord message edits (see editqueue.py); Discord allows about 5 edits per 5s per channel
+DISCORD_EDIT_RATE = 1.0        # Edits per second per channel
+DISCORD_EDIT_BURST = 5         # Edits a quiet channel may send back to back
+DISCORD_EDIT_CONCURRENCY = 5   # Edits in flight across all channels (stays well under the global limit)
+
+# Embed edits are skipped while the visible content is unchanged; the
+# "last updated" footer is still refreshed this often
+EMBED_REFRESH_MINUTES = 15
@@ -0,0 +1,267 @@
+"""
+Central queue for Discord message edits in the WayPoint Discord bot.
+"""
+import asyncio
+from collections import OrderedDict
+import discord
+from config import DISCORD_EDIT_RATE, DISCORD_EDIT_BURST, DISCORD_EDIT_CONCURRENCY
+from ratelimit import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+
+class _PendingEdit:
+    """An embed waiting to be written to one message."""
+
+    __slots__ = ("embed", "fingerprint", "label", "waiters")
+
+    def __init__(self, embed, fingerprint, label):
+        self.embed = embed
+        self.fingerprint = fingerprint
+        self.label = label
+        self.waiters = []
+
+
+class EditQueue:
+    """
+    Latest-wins queue of embed edits, drained per channel.
+
+    Every embed edit the bot makes goes through here. Pending edits are keyed
+    by message, so if a message is edited again before the first edit is sent
+    only the newest embed goes out. Each channel has its own token bucket
+    sized to Discord's per-channel edit limit, so edits are paced before
+    Discord has to reject them, and a global cap bounds edits in flight.
+    """
+
+    def __init__(self, bot, db):
+        """
+        Initialize the queue.
+
+        Args:
+            bot: Discord bot instance, used to resolve channels
+            db (Database): Database, used to record embed fingerprints
+        """
+        self.bot = bot
+        self.db = db
+        self._pending = {}
+        self._buckets = {}
+        self._workers = {}
+        self._in_flight = set()
+        self._semaphore = asyncio.Semaphore(DISCORD_EDIT_CONCURRENCY)
+
+        # Metrics
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.skipped = 0
+        self.failed = 0
+        self.throttled = 0
+        self.max_depth = 0
+
+    def queue_depth(self):
+        """
+        Number of edits waiting to be sent.
+
+        Returns:
+            int: Pending edits across all channels
+        """
+        return sum(len(pending) for pending in self._pending.values())
+
+    def _enqueue(self, channel_id, message_id, embed, fingerprint, label, priority):
+        """Add or replace a message's pending edit and make sure its channel is draining."""
+        self.submitted += 1
+        pending = self._pending.setdefault(channel_id, OrderedDict())
+        entry = pending.get(message_id)
+        if entry is None:
+            entry = pending[message_id] = _PendingEdit(embed, fingerprint, label)
+        else:
+            # A newer embed supersedes the one still waiting; keep its place in line
+            self.coalesced += 1
+            entry.embed = embed
+            entry.fingerprint = fingerprint
+            entry.label = label
+        if priority == PRIORITY_INTERACTIVE:
+            pending.move_to_end(message_id, last=False)
+
+        self.max_depth = max(self.max_depth, self.queue_depth())
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return entry
+
+    def submit(self, channel_id, message_id, embed, fingerprint=None, label="message", priority=PRIORITY_BACKGROUND):
+        """
+        Queue an edit without waiting for it; the outcome is only logged.
+
+        If the message already shows this content the edit is skipped, and any
+        older edit still queued for the message is dropped so it can't
+        overwrite the current content afterwards.
+
+        Args:
+            channel_id (int): Discord channel ID
+            message_id (int): Discord message ID
+            embed (discord.Embed): Embed to show
+            fingerprint (str, optional): Embed fingerprint, used to skip unchanged edits
+                and recorded once the edit lands
+            label (str): Description of the message for log lines
+            priority (int): PRIORITY_INTERACTIVE jumps ahead of the channel's queue
+
+        Returns:
+            bool: True if an edit was queued, False if it was skipped as unchanged
+        """
+        # An edit already on its way may still change the message, so only
+        # trust the recorded fingerprint when nothing is in flight
+        if (fingerprint is not None and message_id not in self._in_flight
+                and self.db.is_embed_current(message_id, fingerprint)):
+            self.skipped += 1
+            stale = self._pending.get(channel_id, {}).pop(message_id, None)
+            if stale is not None:
+                self.coalesced += 1
+                self._resolve(stale, result=True)
+            return False
+
+        self._enqueue(channel_id, message_id, embed, fingerprint, label, priority)
+        return True
+
+    async def edit(self, channel_id, message_id, embed, fingerprint=None, label="message", priority=PRIORITY_INTERACTIVE):
+        """
+        Queue an edit and wait until it has been sent.
+
+        Args:
+            channel_id (int): Discord channel ID
+            message_id (int): Discord message ID
+            embed (discord.Embed): Embed to show
+            fingerprint (str, optional): Embed fingerprint to record once the edit lands
+            label (str): Description of the message for log lines
+            priority (int): PRIORITY_INTERACTIVE jumps ahead of the channel's queue
+
+        Returns:
+            bool: True if the message was edited, False if its channel is gone
+
+        Raises:
+            discord.HTTPException: If Discord rejected the edit (e.g. NotFound)
+        """
+        entry = self._enqueue(channel_id, message_id, embed, fingerprint, label, priority)
+        future = asyncio.get_running_loop().create_future()
+        entry.waiters.append(future)
+        return await future
+
+    async def _get_channel(self, channel_id):
+        """Get a channel from the cache, fetching it only when it isn't cached."""
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            return channel
+        try:
+            return await self.bot.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
+    async def _drain(self, channel_id):
+        """Send a channel's pending edits, oldest first, at the channel's pace."""
+        pending = self._pending[channel_id]
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = RateLimiter(DISCORD_EDIT_RATE, DISCORD_EDIT_BURST)
+
+        try:
+            while pending:
+                await bucket.acquire(PRIORITY_BACKGROUND)
+                async with self._semaphore:
+                    # A skipped submit may have emptied the queue while we waited
+                    if not pending:
+                        break
+                    # Take the entry only once it can be sent so late edits still coalesce
+                    message_id, entry = pending.popitem(last=False)
+                    self._in_flight.add(message_id)
+                    try:
+                        await self._send(channel_id, message_id, entry, bucket)
+                    except Exception as e:
+                        # One bad edit must never stop the channel's worker
+                        self.failed += 1
+                        print(f"❌ Edit queue error for {entry.label}: {e}")
+                        self._resolve(entry, error=e)
+                    finally:
+                        self._in_flight.discard(message_id)
+        finally:
+            if not pending:
+                self._pending.pop(channel_id, None)
+
+    async def _send(self, channel_id, message_id, entry, bucket):
+        """Perform one edit and report the outcome to any waiters."""
+        try:
+            channel = await self._get_channel(channel_id)
+            if channel is None:
+                self.failed += 1
+                print(f"❌ Could not find channel ID {channel_id} for {entry.label}")
+                self._resolve(entry, result=False)
+                return
+            # A partial message skips fetching the message before editing it
+            await channel.get_partial_message(message_id).edit(embed=entry.embed)
+        except Exception as e:
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                # discord.py gave up retrying; slow this channel down and try again
+                # unless a newer edit for the message has been queued meanwhile
+                self.throttled += 1
+                bucket.observe(429, getattr(e.response, "headers", {}) or {})
+                pending = self._pending[channel_id]
+                if message_id not in pending:
+                    pending[message_id] = entry
+                    pending.move_to_end(message_id, last=False)
+                else:
+                    pending[message_id].waiters.extend(entry.waiters)
+                return
+
+            self.failed += 1
+            if isinstance(e, discord.NotFound):
+                print(f"❌ Could not find message ID {message_id} in channel ID {channel_id} for {entry.label}")
+            elif isinstance(e, discord.Forbidden):
+                print(f"❌ Bot lacks permissions to edit message ID {message_id} in channel ID {channel_id} for {entry.label}")
+            else:
+                print(f"❌ Failed to edit {entry.label}: {e}")
+            self._resolve(entry, error=e)
+            return
+
+        self.sent += 1
+        # Let a channel slowed by an earlier 429 recover its pace
+        bucket.observe(200, {})
+        if entry.fingerprint is not None:
+            self.db.record_embed_fingerprint(message_id, entry.fingerprint)
+        print(f"✅ Updated {entry.label}")
+        self._resolve(entry, result=True)
+
+    @staticmethod
+    def _resolve(entry, result=None, error=None):
+        """Hand an edit's outcome to everyone waiting on it."""
+        for future in entry.waiters:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Stop draining; edits still queued are dropped."""
+        workers = [worker for worker in self._workers.values() if not worker.done()]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._pending.clear()
+
+    def metrics(self):
+        """
+        Snapshot of queue state for logging or admin display.
+
+        Returns:
+            dict: Queue depth, busy channels and edit outcome counts
+        """
+        return {
+            "queued": self.queue_depth(),
+            "max_queued": self.max_depth,
+            "channels": sum(1 for worker in self._workers.values() if not worker.done()),
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "throttled": self.throttled
+        }
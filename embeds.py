@@ -1,10 +1,89 @@
 """
 Discord embed creation functions for the WayPoint Discord bot.
 """
+import hashlib
+import json
 import discord
+from config import PLAYER_STATS_TTL
+from ratelimit import PRIORITY_INTERACTIVE
+from utils import format_age
 
 
-async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
+def _footer_text(formatted_time, stale_notes):
+    """
+    Build the "last updated" footer, flagging any data served from cache.
+    
+    Args:
+        formatted_time (str): Formatted timestamp string
+        stale_notes (list): Descriptions of stale data, e.g. "map data 12m old"
+        
+    Returns:
+        str: Footer text
+    """
+    footer = f"last updated {formatted_time} ET"
+    if stale_notes:
+        footer += f" • ⚠️ {', '.join(stale_notes)}"
+    return footer
+
+
+# Live countdowns tick every render; like the footer they are left out of the
+# fingerprint and refreshed with it every EMBED_REFRESH_MINUTES
+COUNTDOWN_FIELDS = ("⏱️ Time Remaining", "⏰ Time Remaining")
+
+
+def embed_fingerprint(embed):
+    """
+    Hash an embed's visible content, ignoring the footer, timestamp and countdowns.
+    
+    Args:
+        embed (discord.Embed): Rendered embed
+        
+    Returns:
+        str: Hex digest that changes only when something besides the footer or a countdown changes
+    """
+    data = embed.to_dict()
+    data.pop('footer', None)
+    data.pop('timestamp', None)
+    if 'fields' in data:
+        # to_dict shares the embed's field dicts, so blank countdowns on copies
+        data['fields'] = [
+            dict(field, value='') if field.get('name') in COUNTDOWN_FIELDS else field
+            for field in data['fields']
+        ]
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _stale_notes(api, keys, apex_uid=None, platform=None):
+    """
+    Describe data that is being rendered from last-known values.
+    
+    Args:
+        api (API): API instance with cached data
+        keys (dict): Endpoint name -> label used in the note
+        apex_uid (str, optional): Also check this player's cached stats
+        platform (str, optional): Platform of apex_uid
+        
+    Returns:
+        list: Notes such as "map data 12m old"
+    """
+    notes = []
+    if apex_uid is not None:
+        player_age = api.player_data_age(apex_uid, platform)
+        if player_age is not None and player_age > PLAYER_STATS_TTL:
+            notes.append(f"stats {format_age(player_age)} old")
+    
+    for key, label in keys.items():
+        if not api.is_stale(key):
+            continue
+        age = api.data_age(key)
+        if age is None:
+            notes.append(f"{label} unavailable")
+        else:
+            notes.append(f"{label} {format_age(age.total_seconds())} old")
+    return notes
+
+
+async def create_player_stats_embed(platform, apex_uid, formatted_time, api, priority=PRIORITY_INTERACTIVE):
     """
     Create a Discord embed with player statistics.
     
@@ -13,27 +92,26 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
         apex_uid (str): Apex Legends UID
         formatted_time (str): Formatted timestamp string
         api (API): API instance with cached data
+        priority (int): Rate limiter lane for the player stats request
         
     Returns:
         discord.Embed: Player statistics embed
     """
     # Fetch player data
-    player_data = await api.fetch_player_stats(apex_uid, platform)
-    global_data = player_data['global']
-    ranked_data = global_data['rank']
+    player = await api.fetch_player_stats(apex_uid, platform, priority)
     
     # Get predcap value
     predcap_value = api.get_predcap_value(platform)
     
     # Calculate RP to Predator
-    if ranked_data['rankScore'] < predcap_value:
-        rp_until_pred = predcap_value - ranked_data['rankScore']
+    if player.rank_score < predcap_value:
+        rp_until_pred = predcap_value - player.rank_score
     else:
         rp_until_pred = 0
         
 
     # Determine embed color based on rank
-    rank_name_lower = ranked_data['rankName'].lower()
+    rank_name_lower = player.rank_name.lower()
     if "predator" in rank_name_lower:
         colour = discord.Colour.red()
     elif "master" in rank_name_lower:
@@ -51,26 +129,26 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
     else:
         colour = discord.Colour.default()
     
-    if ranked_data['rankScore'] >= 16000:
+    if player.rank_score >= 16000:
         rp_until_next_rank = rp_until_pred
         next_rank_name = "Predator"
-    elif ranked_data['rankScore'] >= 12000:
-        rp_until_next_rank = 16000 - ranked_data['rankScore']
+    elif player.rank_score >= 12000:
+        rp_until_next_rank = 16000 - player.rank_score
         next_rank_name = "Master"
-    elif ranked_data['rankScore'] >= 8500:
-        rp_until_next_rank = 12000 - ranked_data['rankScore']
+    elif player.rank_score >= 8500:
+        rp_until_next_rank = 12000 - player.rank_score
         next_rank_name = "Diamond"
-    elif ranked_data['rankScore'] >= 5500:
-        rp_until_next_rank = 8500 - ranked_data['rankScore']
+    elif player.rank_score >= 5500:
+        rp_until_next_rank = 8500 - player.rank_score
         next_rank_name = "Platinum"
-    elif ranked_data['rankScore'] >= 3000:
-        rp_until_next_rank = 5500 - ranked_data['rankScore']
+    elif player.rank_score >= 3000:
+        rp_until_next_rank = 5500 - player.rank_score
         next_rank_name = "Gold"
-    elif ranked_data['rankScore'] >= 1000:
-        rp_until_next_rank = 3000 - ranked_data['rankScore']
+    elif player.rank_score >= 1000:
+        rp_until_next_rank = 3000 - player.rank_score
         next_rank_name = "Silver"
     else:
-        rp_until_next_rank = 1000 - ranked_data['rankScore']
+        rp_until_next_rank = 1000 - player.rank_score
         next_rank_name = "Bronze"
 
 
@@ -78,7 +156,7 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
     # Create embed
     player_embed = discord.Embed(
         title=f"🎮 **__APEX LEGENDS STATS__**",
-        description=f"**Player:** `{global_data['name']}`\n**UID:** `{global_data['uid']}`",
+        description=f"**Player:** `{player.name}`\n**UID:** `{player.uid}`",
         colour=colour
     )
     
@@ -91,13 +169,13 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
     
     player_embed.add_field(
         name="🏆 Current Rank",
-        value=f"```{ranked_data['rankName']} {ranked_data['rankDiv']}```",
+        value=f"```{player.rank_name} {player.rank_div}```",
         inline=True
     )
     
     player_embed.add_field(
         name="🌟 Rank Points",
-        value=f"```{ranked_data['rankScore']} RP```",
+        value=f"```{player.rank_score} RP```",
         inline=True
     )
     
@@ -115,39 +193,51 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
         inline=False
     )
     
+    # Rotations are computed locally from the last payload's timestamps and
+    # may be unknown entirely if the API has never answered
+    ltm_current = api.rotation.current('ltm') or {}
+    ltm_next = api.rotation.next('ltm') or {}
+    ranked_current = api.rotation.current('ranked') or {}
+    ranked_next = api.rotation.next('ranked') or {}
+    
+    ltm_remaining_secs = api.rotation.remaining_secs('ltm')
+    ranked_remaining_secs = api.rotation.remaining_secs('ranked')
+    ltm_remaining = ltm_remaining_secs // 60 if ltm_remaining_secs is not None else None
+    ranked_remaining = ranked_remaining_secs / 60 if ranked_remaining_secs is not None else None
+    
     player_embed.add_field(
         name="LTM",
-        value=f"```{api.ltm_data['current']['eventName']}```",
+        value=f"```{ltm_current.get('eventName', 'N/A')}```",
         inline=True
     )
     
     player_embed.add_field(
         name="⏱️ Time Remaining",
-        value=f"```{api.ltm_data['current']['remainingMins']}m```",
+        value=f"```{ltm_remaining}m```" if ltm_remaining is not None else "```N/A```",
         inline=True
     )
     
     player_embed.add_field(
         name="Next LTM",
-        value=f"```{api.ltm_data['next']['eventName']}```",
+        value=f"```{ltm_next.get('eventName', 'N/A')}```",
         inline=True
     )
     
     player_embed.add_field(
         name="Ranked Map",
-        value=f"```{api.map_data['ranked']['current']['map']}```",
+        value=f"```{ranked_current.get('map', 'N/A')}```",
         inline=True
     )
     
     player_embed.add_field(
         name="⏰ Time Remaining",
-        value=f"```{round(api.map_data['ranked']['current']['remainingMins']/60, 1)}h```",
+        value=f"```{round(ranked_remaining/60, 1)}h```" if ranked_remaining is not None else "```N/A```",
         inline=True
     )
     
     player_embed.add_field(
         name="Next Map",
-        value=f"```{api.map_data['ranked']['next']['map']}```",
+        value=f"```{ranked_next.get('map', 'N/A')}```",
         inline=True
     )
     
@@ -175,19 +265,20 @@ async def create_player_stats_embed(platform, apex_uid, formatted_time, api):
         inline=True
     )
     
-    # Set footer
-    player_embed.set_footer(text=f"last updated {formatted_time} ET")
+    # Set footer, flagging anything rendered from last-known data
+    stale_notes = _stale_notes(api, {"map": "map data", "predator": "pred cap"}, apex_uid, platform)
+    player_embed.set_footer(text=_footer_text(formatted_time, stale_notes))
     
     # Set thumbnail and author
-    rank_img_url = ranked_data.get('rankImg', None)
+    rank_img_url = player.rank_img
     if rank_img_url:
         player_embed.set_thumbnail(url=rank_img_url)
         player_embed.set_author(
-            name=f"{global_data['name']}'s Profile",
+            name=f"{player.name}'s Profile",
             icon_url=rank_img_url
         )
     else:
-        player_embed.set_author(name=f"{global_data['name']}'s Profile")
+        player_embed.set_author(name=f"{player.name}'s Profile")
     
     return player_embed
 
@@ -205,15 +296,13 @@ async def create_admin_stats_embed(platform, apex_uid, formatted_time, api):
         discord.Embed: Player statistics embed
     """
     # Fetch player data
-    player_data = await api.fetch_player_stats(apex_uid, platform)
-    global_data = player_data['global']
-    ranked_data = global_data['rank']
+    player = await api.fetch_player_stats(apex_uid, platform)
     
     # Get predcap value
     predcap_value = api.get_predcap_value(platform)
     
     # Determine embed color based on rank
-    rank_name_lower = ranked_data['rankName'].lower()
+    rank_name_lower = player.rank_name.lower()
     if "predator" in rank_name_lower:
         colour = discord.Colour.red()
     elif "master" in rank_name_lower:
@@ -234,7 +323,7 @@ async def create_admin_stats_embed(platform, apex_uid, formatted_time, api):
     # Create embed
     player_embed = discord.Embed(
         title=f"🎮 **__APEX LEGENDS STATS__**",
-        description=f"**Player:** `{global_data['name']}`\n**UID:** `{global_data['uid']}`",
+        description=f"**Player:** `{player.name}`\n**UID:** `{player.uid}`",
         colour=colour
     )
     
@@ -247,19 +336,19 @@ async def create_admin_stats_embed(platform, apex_uid, formatted_time, api):
     
     player_embed.add_field(
         name="🏆 Current Rank",
-        value=f"```{ranked_data['rankName']} {ranked_data['rankDiv']}```",
+        value=f"```{player.rank_name} {player.rank_div}```",
         inline=True
     )
     
     player_embed.add_field(
         name="🌟 Rank Points",
-        value=f"```{ranked_data['rankScore']} RP```",
+        value=f"```{player.rank_score} RP```",
         inline=True
     )
     
     # Calculate RP to Predator
-    if ranked_data['rankScore'] < predcap_value:
-        rp_until_pred = predcap_value - ranked_data['rankScore']
+    if player.rank_score < predcap_value:
+        rp_until_pred = predcap_value - player.rank_score
     else:
         rp_until_pred = 0
     
@@ -287,19 +376,20 @@ async def create_admin_stats_embed(platform, apex_uid, formatted_time, api):
         inline=True
     )
     
-    # Set footer
-    player_embed.set_footer(text=f"last updated {formatted_time} ET")
+    # Set footer, flagging anything rendered from last-known data
+    stale_notes = _stale_notes(api, {"predator": "pred cap"}, apex_uid, platform)
+    player_embed.set_footer(text=_footer_text(formatted_time, stale_notes))
     
     # Set thumbnail and author
-    rank_img_url = ranked_data.get('rankImg', None)
+    rank_img_url = player.rank_img
     if rank_img_url:
         player_embed.set_thumbnail(url=rank_img_url)
         player_embed.set_author(
-            name=f"{global_data['name']}'s Profile",
+            name=f"{player.name}'s Profile",
             icon_url=rank_img_url
         )
     else:
-        player_embed.set_author(name=f"{global_data['name']}'s Profile")
+        player_embed.set_author(name=f"{player.name}'s Profile")
     
     return player_embed
 
@@ -390,10 +480,98 @@ def create_server_status_embed(formatted_time, api):
             inline=True
         )
     
-    server_embed.set_footer(text=f"last updated {formatted_time} ET")
+    server_embed.set_footer(text=_footer_text(formatted_time, _stale_notes(api, {"server": "server data"})))
     
     # Set thumbnail
     rank_img_url = "https://upload.wikimedia.org/wikipedia/commons/b/b1/Apex_legends_simple_logo.jpg"
     server_embed.set_thumbnail(url=rank_img_url)
     
     return server_embed
+
+
+def create_api_metrics_embed(formatted_time, api, edits=None):
+    """
+    Create a Discord embed with outbound API health metrics.
+    
+    Args:
+        formatted_time (str): Formatted timestamp string
+        api (API): API instance
+        edits (EditQueue, optional): Discord edit queue to report on
+        
+    Returns:
+        discord.Embed: Rate limiter, circuit breaker, cache and edit queue metrics embed
+    """
+    metrics = api.limiter.metrics()
+    metrics_embed = discord.Embed(
+        title="📊 **API METRICS**",
+        description=f"Rate: {metrics['rate']:.2f}/{metrics['base_rate']:.2f} req/s • Throttled {metrics['throttled']} times",
+        colour=discord.Colour.dark_grey()
+    )
+    
+    for name, lane in metrics["lanes"].items():
+        metrics_embed.add_field(
+            name=f"🚦 {name.title()} lane",
+            value=(
+                f"```Queued:   {lane['queued']}\n"
+                f"Granted:  {lane['granted']}\n"
+                f"Avg wait: {lane['avg_wait']:.2f}s\n"
+                f"Max wait: {lane['max_wait']:.2f}s```"
+            ),
+            inline=True
+        )
+    
+    breakers = "\n".join(f"{name}: {breaker.state}" for name, breaker in api.breakers.items())
+    metrics_embed.add_field(name="🔌 Circuits", value=f"```{breakers}```", inline=False)
+    
+    cache = api.player_cache
+    metrics_embed.add_field(
+        name="🗃️ Player cache",
+        value=f"```Entries: {len(cache)}\nHits: {cache.hits}  Misses: {cache.misses}  Coalesced: {cache.coalesced}```",
+        inline=False
+    )
+    
+    if edits is not None:
+        queue = edits.metrics()
+        metrics_embed.add_field(
+            name="✏️ Discord edits",
+            value=(
+                f"```Queued: {queue['queued']} (max {queue['max_queued']}) in {queue['channels']} channels\n"
+                f"Sent: {queue['sent']}  Coalesced: {queue['coalesced']}  Unchanged: {queue['skipped']}  Failed: {queue['failed']}  Throttled: {queue['throttled']}```"
+            ),
+            inline=False
+        )
+    
+    metrics_embed.set_footer(text=_footer_text(formatted_time, []))
+    return metrics_embed
+
+
+def create_leaderboard_embed(guild_name, rows, total, formatted_time, highlight_id=None, title="Top players"):
+    """
+    Create a Discord embed with a guild's RP standings.
+    
+    Args:
+        guild_name (str): Discord server name
+        rows (list): (position, discord_id, rank_score) tuples from Leaderboard
+        total (int): Number of ranked members in the server
+        formatted_time (str): Formatted timestamp string
+        highlight_id (int, optional): Discord user ID to bold
+        title (str): View name shown in the description
+        
+    Returns:
+        discord.Embed: Leaderboard embed
+    """
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    lines = []
+    for position, discord_id, rank_score in rows:
+        line = f"{medals.get(position, f'`#{position}`')} <@{discord_id}> — **{rank_score:,} RP**"
+        if discord_id == highlight_id:
+            line = f"▶️ {line}"
+        lines.append(line)
+    
+    leaderboard_embed = discord.Embed(
+        title=f"🏆 **{guild_name.upper()} LEADERBOARD**",
+        description=f"{title} • {total} ranked\n\n" + ("\n".join(lines) or "No RP recorded yet."),
+        colour=discord.Colour.gold()
+    )
+    leaderboard_embed.set_footer(text=_footer_text(formatted_time, []))
+    return leaderboard_embed
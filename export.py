@@ -0,0 +1,158 @@
+"""
+Streaming CSV / NDJSON export of bot data for the WayPoint Discord bot.
+"""
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from config import EXPORT_CHUNK_BYTES, TIMEZONE_ET
+
+
+# Exportable datasets: (columns, rest of the SELECT after the column list)
+EXPORTS = {
+    "users": (
+        ("discord_id", "discord_server_id", "apex_uid", "platform", "current_RP", "time_registered", "steam_id"),
+        "FROM users ORDER BY discord_id"
+    ),
+    "memberships": (
+        ("discord_id", "discord_server_id", "rank_score", "stats_channel_id", "stats_message_id"),
+        "FROM memberships ORDER BY discord_server_id, discord_id"
+    ),
+    "rp_history": (
+        ("apex_uid", "platform", "ts", "rank_score", "rank_name", "rank_div"),
+        "FROM rp_snapshots ORDER BY apex_uid, platform, ts"
+    )
+}
+
+FORMATS = ("csv", "ndjson")
+
+
+class ChunkedWriter:
+    """
+    Writes rows to numbered files, starting a new file once one passes
+    `max_bytes` on disk so every chunk fits in a Discord attachment.
+    """
+
+    def __init__(self, base_path, fmt, columns, compress=False, max_bytes=EXPORT_CHUNK_BYTES):
+        """
+        Initialize the writer; no file is opened until the first row.
+
+        Args:
+            base_path (str): Path prefix for chunk files (".partN.csv" etc. is appended)
+            fmt (str): "csv" or "ndjson"
+            columns (tuple): Column names, used as CSV header / JSON keys
+            compress (bool): Gzip each chunk
+            max_bytes (int): Size on disk at which a new chunk is started
+        """
+        self.base_path = base_path
+        self.fmt = fmt
+        self.columns = columns
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.paths = []
+        self.rows = 0
+        self._raw = None
+        self._text = None
+        self._csv = None
+
+    def _open_chunk(self):
+        """Close the current chunk and start the next one."""
+        self._close_chunk()
+        extension = self.fmt + (".gz" if self.compress else "")
+        path = f"{self.base_path}.part{len(self.paths) + 1}.{extension}"
+        self._raw = open(path, "wb")
+        stream = gzip.GzipFile(fileobj=self._raw, mode="wb") if self.compress else self._raw
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        self._csv = csv.writer(self._text) if self.fmt == "csv" else None
+        if self._csv is not None:
+            self._csv.writerow(self.columns)
+        self.paths.append(path)
+
+    def _close_chunk(self):
+        """Flush and close the current chunk, if any."""
+        if self._text is not None:
+            # Closing the wrapper closes the gzip stream, which writes its trailer
+            self._text.close()
+            if not self._raw.closed:
+                self._raw.close()
+            self._text = None
+            self._raw = None
+
+    def write_rows(self, rows):
+        """
+        Append a batch of rows, rolling over to a new chunk when full.
+
+        Args:
+            rows (list): Row tuples in `columns` order
+        """
+        if self._text is None:
+            self._open_chunk()
+
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            for row in rows:
+                self._text.write(json.dumps(dict(zip(self.columns, row)), default=str))
+                self._text.write("\n")
+        self.rows += len(rows)
+
+        # Check the size between batches; one batch of overshoot is fine
+        self._text.flush()
+        if self._raw.tell() >= self.max_bytes:
+            self._close_chunk()
+
+    def close(self):
+        """
+        Finish the export.
+
+        Returns:
+            list: Paths of every chunk written
+        """
+        if not self.paths:
+            # Still produce one (header-only) file for an empty table
+            self._open_chunk()
+        self._close_chunk()
+        return self.paths
+
+
+async def export_dataset(db, dataset, fmt="csv", compress=False, directory="exports"):
+    """
+    Stream a dataset from the database into chunked files.
+
+    Memory use is bounded by one fetch batch regardless of table size; file
+    writes and compression run in a worker thread.
+
+    Args:
+        db (Database): Database to read from
+        dataset (str): Key of EXPORTS
+        fmt (str): "csv" or "ndjson"
+        compress (bool): Gzip each chunk
+        directory (str): Directory the chunk files are written to
+
+    Returns:
+        tuple: (list of chunk paths, number of rows exported)
+
+    Raises:
+        ValueError: If the dataset or format is unknown
+    """
+    if dataset not in EXPORTS:
+        raise ValueError(f"Unknown dataset '{dataset}'")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'")
+
+    columns, rest = EXPORTS[dataset]
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(TIMEZONE_ET).strftime("%Y%m%d-%H%M%S")
+    writer = ChunkedWriter(os.path.join(directory, f"{dataset}-{stamp}"), fmt, columns, compress)
+
+    try:
+        async for rows in db.iter_rows(f"SELECT {', '.join(columns)} {rest}"):
+            await asyncio.to_thread(writer.write_rows, rows)
+    finally:
+        paths = await asyncio.to_thread(writer.close)
+
+    print(f"✅ Exported {writer.rows} {dataset} rows to {len(paths)} file(s)")
+    return paths, writer.rows
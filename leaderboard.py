@@ -0,0 +1,127 @@
+"""
+In-memory per-guild RP leaderboard for the WayPoint Discord bot.
+"""
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    """
+    RP standings for every guild, kept sorted as scores are observed.
+
+    Each guild holds a list of (-rank_score, discord_id) in ascending order,
+    so the highest RP is first and ties are broken by Discord ID. Updates
+    are a binary search plus a list insert, and top-N or around-me views
+    are a slice, so no command ever has to rescan users or refetch players.
+    """
+
+    def __init__(self):
+        """Initialize empty standings."""
+        self._entries = {}
+        self._scores = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def update(self, discord_server_id, discord_id, rank_score):
+        """
+        Record a member's latest RP.
+
+        Args:
+            discord_server_id (int): Discord server ID
+            discord_id (int): Discord user ID
+            rank_score (int): Latest observed RP
+
+        Returns:
+            bool: True if the member's standing changed
+        """
+        scores = self._scores.setdefault(discord_server_id, {})
+        entries = self._entries.setdefault(discord_server_id, [])
+        previous = scores.get(discord_id)
+        if previous == rank_score:
+            return False
+        if previous is not None:
+            del entries[bisect_left(entries, (-previous, discord_id))]
+        insort(entries, (-rank_score, discord_id))
+        scores[discord_id] = rank_score
+        return True
+
+    def remove(self, discord_server_id, discord_id):
+        """
+        Drop a member from a guild's standings.
+
+        Args:
+            discord_server_id (int): Discord server ID
+            discord_id (int): Discord user ID
+        """
+        previous = self._scores.get(discord_server_id, {}).pop(discord_id, None)
+        if previous is not None:
+            entries = self._entries[discord_server_id]
+            del entries[bisect_left(entries, (-previous, discord_id))]
+
+    def position(self, discord_server_id, discord_id):
+        """
+        Get a member's 1-based position in a guild.
+
+        Args:
+            discord_server_id (int): Discord server ID
+            discord_id (int): Discord user ID
+
+        Returns:
+            int: Position, or None if the member has no observed RP
+        """
+        rank_score = self._scores.get(discord_server_id, {}).get(discord_id)
+        if rank_score is None:
+            return None
+        return bisect_left(self._entries[discord_server_id], (-rank_score, discord_id)) + 1
+
+    def _slice(self, discord_server_id, start, stop):
+        """Get (position, discord_id, rank_score) rows for a slice of a guild's standings."""
+        entries = self._entries.get(discord_server_id, [])
+        start = max(0, start)
+        return [
+            (position, discord_id, -negative_score)
+            for position, (negative_score, discord_id) in enumerate(entries[start:stop], start=start + 1)
+        ]
+
+    def top(self, discord_server_id, count):
+        """
+        Get the highest-RP members of a guild.
+
+        Args:
+            discord_server_id (int): Discord server ID
+            count (int): Number of rows
+
+        Returns:
+            list: (position, discord_id, rank_score) tuples, best first
+        """
+        return self._slice(discord_server_id, 0, count)
+
+    def around(self, discord_server_id, discord_id, radius):
+        """
+        Get the members ranked just above and below a member.
+
+        Args:
+            discord_server_id (int): Discord server ID
+            discord_id (int): Discord user ID
+            radius (int): Rows to include on each side
+
+        Returns:
+            list: (position, discord_id, rank_score) tuples, or an empty list
+                if the member has no observed RP
+        """
+        position = self.position(discord_server_id, discord_id)
+        if position is None:
+            return []
+        return self._slice(discord_server_id, position - 1 - radius, position + radius)
+
+    def size(self, discord_server_id):
+        """
+        Number of ranked members in a guild.
+
+        Args:
+            discord_server_id (int): Discord server ID
+
+        Returns:
+            int: Ranked member count
+        """
+        return len(self._entries.get(discord_server_id, []))
@@ -9,6 +9,7 @@ import logging
 from config import DISCORD_TOKEN
 from database import Database
 from api import API
+from editqueue import EditQueue
 from commands import setup_all_commands
 from tasks import setup_tasks
 
@@ -24,12 +25,31 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-# Initialize bot
-bot = commands.Bot(command_prefix='!', intents=intents)
-
 # Initialize database and API instances
 db = Database()
-api = API()
+api = API(db)
+api.add_player_listener(db.record_rp_snapshot)
+api.add_player_listener(db.record_leaderboard_rp)
+
+
+class WayPointBot(commands.Bot):
+    """Bot subclass that ties shared resources to the client lifecycle."""
+    
+    async def setup_hook(self):
+        """Open the shared HTTP session before connecting to Discord."""
+        await api.start()
+    
+    async def close(self):
+        """Shut down the Discord connection, then release shared resources."""
+        await super().close()
+        await edits.close()
+        await api.close()
+        await db.close()
+
+
+# Initialize bot
+bot = WayPointBot(command_prefix='!', intents=intents)
+edits = EditQueue(bot, db)
 
 
 @bot.event
@@ -45,14 +65,14 @@ async def on_ready():
     await api.fetch_all_data()
 
     # Set up commands
-    await setup_all_commands(bot, db, api)
+    await setup_all_commands(bot, db, api, edits)
     
     # Sync commands with Discord (must be done AFTER registering commands)
     await bot.tree.sync()
     print("✅ Commands synced with Discord")
     
     # Start periodic tasks
-    setup_tasks(bot, db, api)
+    setup_tasks(bot, db, api, edits)
     print(f'✅ {bot.user.name} is online and connected to Discord!')
 
 
@@ -74,8 +94,6 @@ if __name__ == "__main__":
 # 
 # - implement error handling for api requests
 # - add steam api usage for automatic rp tracking on pc platform (if rp==0 ignore )
-# - fix db so that stats uses discord server uid and users uid to allow same user in different servers
-# - implement leaderboard command to view top 3 players in server by rp 
 
 # Priority 2
 # - implement nuke command to clear db for admin users
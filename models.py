@@ -0,0 +1,135 @@
+"""
+Typed records for data passed around the WayPoint Discord bot.
+"""
+from dataclasses import dataclass, fields
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerSnapshot:
+    """The subset of a /bridge player response that the bot uses."""
+
+    name: str
+    uid: str
+    rank_name: str
+    rank_div: int
+    rank_score: int
+    rank_img: str | None = None
+    is_online: bool = False
+    is_in_game: bool = False
+
+    @classmethod
+    def from_bridge(cls, data):
+        """
+        Build a snapshot from a /bridge JSON response.
+
+        Args:
+            data (dict): Parsed /bridge response
+
+        Returns:
+            PlayerSnapshot: Parsed player record
+
+        Raises:
+            ValueError: If the response is an API error rather than player data
+        """
+        global_data = data.get('global')
+        if not isinstance(global_data, dict):
+            raise ValueError(data.get('Error', "Unexpected player stats response"))
+
+        rank = global_data['rank']
+        realtime = data.get('realtime') or {}
+        return cls(
+            name=global_data['name'],
+            uid=str(global_data['uid']),
+            rank_name=rank['rankName'],
+            rank_div=rank['rankDiv'],
+            rank_score=int(rank['rankScore']),
+            rank_img=rank.get('rankImg'),
+            is_online=bool(realtime.get('isOnline')),
+            is_in_game=bool(realtime.get('isInGame'))
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class User:
+    """A row of the users table."""
+
+    discord_id: int
+    discord_server_id: int | None = None
+    apex_uid: str | None = None
+    platform: str | None = None
+    current_RP: int | None = None
+    time_registered: object = None
+    steam_id: str | None = None
+    session_start_RP: int | None = None
+    session_start_time: object = None
+    is_in_game: bool = False
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        sqlite3 row factory mapping selected columns to fields by name.
+
+        Args:
+            cursor: The executing cursor
+            row (tuple): Raw column values
+
+        Returns:
+            User: Parsed user record
+        """
+        values = dict(zip((column[0] for column in cursor.description), row))
+        values['is_in_game'] = bool(values.get('is_in_game'))
+        return cls(**values)
+
+
+@dataclass(frozen=True, slots=True)
+class Server:
+    """A row of the servers table."""
+
+    discord_server_id: int
+    apex_server_channel_id: int | None = None
+    apex_server_message_id: int | None = None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        sqlite3 row factory mapping selected columns to fields by name.
+
+        Args:
+            cursor: The executing cursor
+            row (tuple): Raw column values
+
+        Returns:
+            Server: Parsed server record
+        """
+        return cls(**dict(zip((column[0] for column in cursor.description), row)))
+
+
+@dataclass(frozen=True, slots=True)
+class Membership:
+    """A row of the memberships table: one registered user in one guild."""
+
+    discord_id: int
+    discord_server_id: int
+    stats_message_id: int | None = None
+    stats_channel_id: int | None = None
+    rank_score: int | None = None
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """
+        sqlite3 row factory mapping selected columns to fields by name.
+
+        Args:
+            cursor: The executing cursor
+            row (tuple): Raw column values
+
+        Returns:
+            Membership: Parsed membership record
+        """
+        return cls(**dict(zip((column[0] for column in cursor.description), row)))
+
+
+# Column lists matching the record field order, used to build SELECTs
+USER_COLUMNS = tuple(f.name for f in fields(User))
+SERVER_COLUMNS = tuple(f.name for f in fields(Server))
+MEMBERSHIP_COLUMNS = tuple(f.name for f in fields(Membership))
@@ -0,0 +1,261 @@
+"""
+Request rate limiting and circuit breaking for outbound API calls in the WayPoint Discord bot.
+"""
+import asyncio
+import time
+from collections import deque
+
+
+# Priority lanes; lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with priority lanes.
+
+    Callers wait in a per-priority queue and tokens are always handed to the
+    highest-priority waiter first, so slash commands are never starved by the
+    background loops. The refill rate is cut when the upstream API signals a
+    rate limit and recovers gradually on successful responses.
+    """
+
+    def __init__(self, rate, burst, min_rate=None, default_backoff=5.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Steady-state requests per second
+            burst (int): Maximum tokens that can accumulate
+            min_rate (float, optional): Lowest rate a slowdown may reduce to
+            default_backoff (float): Seconds to pause after a 429 without Retry-After
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.capacity = burst
+        self.default_backoff = default_backoff
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lanes = {PRIORITY_INTERACTIVE: deque(), PRIORITY_BACKGROUND: deque()}
+        self._drainer = None
+
+        # Metrics
+        self.granted = {lane: 0 for lane in self._lanes}
+        self.total_wait = {lane: 0.0 for lane in self._lanes}
+        self.max_wait = {lane: 0.0 for lane in self._lanes}
+        self.throttled = 0
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def queue_depth(self, priority=None):
+        """
+        Number of callers currently waiting for a token.
+
+        Args:
+            priority (int, optional): Only count this lane
+
+        Returns:
+            int: Waiting callers
+        """
+        if priority is not None:
+            return len(self._lanes[priority])
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """
+        Wait until a request may be sent.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+        """
+        now = self._refill()
+        if self.queue_depth() == 0 and now >= self.blocked_until and self.tokens >= 1:
+            self.tokens -= 1
+            self._record_wait(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((now, future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+
+    def _record_wait(self, priority, waited):
+        """Update wait-time metrics for a granted token."""
+        self.granted[priority] += 1
+        self.total_wait[priority] += waited
+        if waited > self.max_wait[priority]:
+            self.max_wait[priority] = waited
+
+    def _next_waiter(self):
+        """Pop the oldest live waiter from the highest-priority non-empty lane."""
+        for priority in sorted(self._lanes):
+            lane = self._lanes[priority]
+            while lane:
+                enqueued, future = lane.popleft()
+                if not future.done():
+                    return priority, enqueued, future
+        return None
+
+    async def _drain(self):
+        """Hand out tokens to queued callers as they become available."""
+        while self.queue_depth():
+            now = self._refill()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            priority, enqueued, future = waiter
+            self.tokens -= 1
+            self._record_wait(priority, now - enqueued)
+            future.set_result(None)
+
+    def observe(self, status, headers):
+        """
+        Adjust pacing from an upstream response.
+
+        A 429 or an exhausted rate-limit header halves the refill rate and
+        pauses the bucket; any other response slowly restores the rate.
+
+        Args:
+            status (int): HTTP status code
+            headers (Mapping): Response headers
+        """
+        remaining = headers.get('X-RateLimit-Remaining')
+        exhausted = remaining is not None and remaining.strip() == '0'
+
+        if status != 429 and not exhausted:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+            return
+
+        backoff = self.default_backoff
+        for header in ('Retry-After', 'X-RateLimit-Reset'):
+            try:
+                backoff = max(0.0, float(headers[header]))
+                break
+            except (KeyError, TypeError, ValueError):
+                continue
+        # Reset headers are sometimes absolute epoch seconds
+        if backoff > 3600:
+            backoff = max(0.0, backoff - time.time())
+
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+        print(f"⚠️ Rate limited by API; pausing {backoff:.1f}s and slowing to {self.rate:.2f} req/s")
+
+    def metrics(self):
+        """
+        Snapshot of limiter state for logging or admin display.
+
+        Returns:
+            dict: Rate, queue depths, grant counts and wait times per lane
+        """
+        lanes = {}
+        for priority, name in ((PRIORITY_INTERACTIVE, "interactive"), (PRIORITY_BACKGROUND, "background")):
+            granted = self.granted[priority]
+            lanes[name] = {
+                "queued": len(self._lanes[priority]),
+                "granted": granted,
+                "avg_wait": self.total_wait[priority] / granted if granted else 0.0,
+                "max_wait": self.max_wait[priority]
+            }
+        return {
+            "rate": self.rate,
+            "base_rate": self.base_rate,
+            "throttled": self.throttled,
+            "lanes": lanes
+        }
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because its endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests are refused without touching the network. Once the backoff has
+    elapsed a single half-open probe is let through: success closes the
+    circuit, failure re-opens it with the backoff doubled.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, failure_threshold, base_backoff, max_backoff):
+        """
+        Initialize the breaker.
+
+        Args:
+            name (str): Endpoint name used in log messages
+            failure_threshold (int): Consecutive failures before opening
+            base_backoff (float): Seconds to stay open after the first trip
+            max_backoff (float): Upper bound for the doubling backoff
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.retry_at = 0.0
+
+    def allow(self):
+        """
+        Check whether a request may be sent now.
+
+        Returns:
+            bool: True if the request should go ahead
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if now < self.retry_at:
+            # Still backing off, or a half-open probe is already in flight
+            return False
+        # Let one probe through per backoff window
+        self.state = self.HALF_OPEN
+        self.retry_at = now + self.backoff
+        print(f"🔌 Circuit for {self.name} half-open; sending probe")
+        return True
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        if self.state != self.CLOSED:
+            print(f"✅ Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.backoff = self.base_backoff
+
+    def record_failure(self):
+        """Count a failed request, opening the circuit when needed."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.backoff = min(self.max_backoff, self.backoff * 2)
+        elif self.failures < self.failure_threshold:
+            return
+
+        self.state = self.OPEN
+        self.retry_at = time.monotonic() + self.backoff
+        print(f"🔌 Circuit for {self.name} open; retrying in {self.backoff:.0f}s")
@@ -0,0 +1,264 @@
+"""
+HTTP record/replay harness for the WayPoint Discord bot.
+
+Recording: set HTTP_RECORD_DIR and the API will save every Mozambique and
+Steam response it receives as a JSON fixture (credentials are stripped).
+
+Replaying: run this module to serve those fixtures from a local stand-in
+server, then point MOZAMBIQUE_BASE_URL and STEAM_BASE_URL at it:
+
+    python replay.py --fixtures fixtures --port 8080 --latency 0.2 --error-rate 0.05 --rate-limit 2
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from urllib.parse import parse_qsl, urlencode
+import aiohttp
+from aiohttp import web
+
+
+# Query parameters that carry credentials and must never be written to disk
+SECRET_PARAMS = {"auth", "key"}
+
+# Response headers worth keeping in a fixture
+RECORDED_HEADERS = {"content-type", "retry-after", "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"}
+
+
+def canonical_query(query):
+    """
+    Normalize a query string for fixture matching.
+
+    Args:
+        query (Mapping or str): Query parameters
+
+    Returns:
+        str: Sorted, URL-encoded query without credential parameters
+    """
+    items = parse_qsl(query, keep_blank_values=True) if isinstance(query, str) else list(query.items())
+    return urlencode(sorted((k, v) for k, v in items if k.lower() not in SECRET_PARAMS))
+
+
+class Recorder:
+    """Writes received HTTP responses to a fixture directory."""
+
+    def __init__(self, fixture_dir):
+        """
+        Initialize the recorder.
+
+        Args:
+            fixture_dir (str): Directory fixtures are written to
+        """
+        self.fixture_dir = fixture_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+
+    def save(self, url, status, headers, body):
+        """
+        Save a single response as a fixture file.
+
+        Args:
+            url (yarl.URL): Request URL
+            status (int): HTTP status code
+            headers (Mapping): Response headers
+            body (bytes): Raw response body
+        """
+        query = canonical_query(url.query)
+        fixture = {
+            "path": url.path,
+            "query": query,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() in RECORDED_HEADERS},
+            "body": body.decode("utf-8", errors="replace"),
+            "recorded_at": time.time()
+        }
+        slug = url.path.strip("/").replace("/", "_") or "root"
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        path = os.path.join(self.fixture_dir, f"{slug}__{digest}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, indent=2)
+
+    def response_class(self):
+        """
+        Build an aiohttp response class that records bodies as they are read.
+
+        Returns:
+            type: ClientResponse subclass to pass to ClientSession(response_class=...)
+        """
+        recorder = self
+
+        class RecordingResponse(aiohttp.ClientResponse):
+            async def read(self):
+                body = await super().read()
+                try:
+                    recorder.save(self.url, self.status, self.headers, body)
+                except OSError as e:
+                    print(f"⚠️ Failed to record fixture for {self.url.path}: {e}")
+                return body
+
+        return RecordingResponse
+
+
+class FixtureStore:
+    """Recorded responses indexed for lookup by the stand-in server."""
+
+    def __init__(self, fixture_dir):
+        """
+        Load every fixture in a directory.
+
+        Args:
+            fixture_dir (str): Directory containing recorded fixtures
+        """
+        self.exact = {}
+        self.by_path = {}
+        for name in sorted(os.listdir(fixture_dir)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+                fixture = json.load(f)
+            self.exact[(fixture["path"], fixture["query"])] = fixture
+            self.by_path.setdefault(fixture["path"], []).append(fixture)
+        print(f"✅ Loaded {len(self.exact)} fixtures from {fixture_dir}")
+
+    def lookup(self, path, query):
+        """
+        Find the fixture for a request.
+
+        Falls back to any successful recording of the same path so load tests
+        can use UIDs and Steam IDs that were never recorded.
+
+        Args:
+            path (str): Request path
+            query (str): Canonical query string
+
+        Returns:
+            dict: Fixture, or None if the path was never recorded
+        """
+        fixture = self.exact.get((path, query))
+        if fixture is not None:
+            return fixture
+        candidates = [f for f in self.by_path.get(path, []) if f["status"] < 400]
+        return random.choice(candidates) if candidates else None
+
+
+class StandInServer:
+    """Local stand-in for the Mozambique and Steam APIs that replays fixtures."""
+
+    def __init__(self, store, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, burst=None):
+        """
+        Initialize the server.
+
+        Args:
+            store (FixtureStore): Recorded responses
+            latency (float): Base seconds added to every response
+            jitter (float): Random extra seconds (0..jitter) added to every response
+            error_rate (float): Fraction of requests answered with a 500
+            rate_limit (float, optional): Requests per second before answering 429
+            burst (int, optional): Requests allowed back-to-back under rate_limit
+        """
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else max(1, int(rate_limit or 1))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.rejected = 0
+
+    def _take_token(self):
+        """
+        Try to consume a rate-limit token.
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        if not self.rate_limit:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_limit)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate_limit
+
+    def _player_summaries(self, fixture, steam_ids):
+        """Rewrite a recorded GetPlayerSummaries body to cover the requested IDs."""
+        players = json.loads(fixture["body"]).get("response", {}).get("players", [])
+        template = players[0] if players else {"personaname": "stand-in"}
+        synthesized = [dict(template, steamid=steam_id) for steam_id in steam_ids]
+        return json.dumps({"response": {"players": synthesized}})
+
+    async def handle(self, request):
+        """Serve a single request from the fixture store."""
+        self.requests += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        retry_after = self._take_token()
+        if retry_after:
+            self.rejected += 1
+            return web.json_response(
+                {"Error": "Rate limit exceeded"},
+                status=429,
+                headers={"Retry-After": f"{retry_after:.1f}", "X-RateLimit-Remaining": "0"}
+            )
+
+        if random.random() < self.error_rate:
+            return web.json_response({"Error": "Simulated upstream failure"}, status=500)
+
+        query = canonical_query(request.query)
+        fixture = self.store.lookup(request.path, query)
+        if fixture is None:
+            return web.json_response({"Error": f"No fixture recorded for {request.path}"}, status=404)
+
+        body = fixture["body"]
+        steam_ids = request.query.get("steamids")
+        if request.path.endswith("GetPlayerSummaries/v2/") and steam_ids and fixture["query"] != query:
+            body = self._player_summaries(fixture, steam_ids.split(","))
+
+        headers = {k: v for k, v in fixture["headers"].items() if k.lower() != "content-type"}
+        content_type = fixture["headers"].get("Content-Type", "application/json").split(";")[0]
+        return web.Response(text=body, status=fixture["status"], headers=headers, content_type=content_type)
+
+    def app(self):
+        """
+        Build the aiohttp application.
+
+        Returns:
+            web.Application: App routing every GET to the fixture store
+        """
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        return app
+
+
+def main():
+    """Run the stand-in server from the command line."""
+    parser = argparse.ArgumentParser(description="Replay recorded Mozambique/Steam responses locally.")
+    parser.add_argument("--fixtures", default="fixtures", help="Directory of recorded fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before answering 429")
+    parser.add_argument("--burst", type=int, default=None, help="Requests allowed back-to-back")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        FixtureStore(args.fixtures),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Local map rotation clock for the WayPoint Discord bot.
+"""
+import time
+
+
+class RotationClock:
+    """
+    Tracks map and LTM rotations from a /maprotation v2 payload.
+
+    The payload's start/end timestamps let the current map, next map and time
+    remaining be worked out locally at any moment, so countdowns stay accurate
+    without re-downloading the rotation. When a rotation ends before fresh
+    data arrives, its "next" entry is promoted to current.
+    """
+
+    def __init__(self):
+        """Initialize an empty clock."""
+        self.modes = {}
+
+    def update(self, data, fetched_at=None):
+        """
+        Load rotation timings from a /maprotation v2 payload.
+
+        Args:
+            data (dict): Parsed /maprotation response
+            fetched_at (float, optional): Epoch seconds the payload was fetched
+        """
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        modes = {}
+        for mode, rotation in data.items():
+            if not isinstance(rotation, dict) or not isinstance(rotation.get('current'), dict):
+                continue
+
+            current = dict(rotation['current'])
+            if not isinstance(current.get('end'), (int, float)):
+                remaining = current.get('remainingSecs')
+                if not isinstance(remaining, (int, float)):
+                    continue
+                current['end'] = fetched_at + remaining
+
+            upcoming = rotation.get('next')
+            if isinstance(upcoming, dict):
+                upcoming = dict(upcoming)
+                upcoming.setdefault('start', current['end'])
+                if not isinstance(upcoming.get('end'), (int, float)):
+                    duration = upcoming.get('DurationInSecs')
+                    upcoming['end'] = upcoming['start'] + duration if isinstance(duration, (int, float)) else None
+            else:
+                upcoming = None
+
+            modes[mode] = (current, upcoming)
+        self.modes = modes
+
+    def _entries(self, mode, now=None):
+        """
+        Get the (current, next) entries for a mode as of `now`.
+
+        Returns:
+            tuple: (current, next) dicts, either of which may be None
+        """
+        if mode not in self.modes:
+            return None, None
+        now = now if now is not None else time.time()
+        current, upcoming = self.modes[mode]
+        if now < current['end']:
+            return current, upcoming
+        # The rotation has ended; the old "next" is now live
+        if upcoming is not None and (upcoming['end'] is None or now < upcoming['end']):
+            return upcoming, None
+        return None, None
+
+    def current(self, mode):
+        """
+        Get the rotation entry live right now.
+
+        Args:
+            mode (str): Payload key such as "ranked", "battle_royale" or "ltm"
+
+        Returns:
+            dict: The live entry (with "map"/"eventName" etc.), or None if unknown
+        """
+        return self._entries(mode)[0]
+
+    def next(self, mode):
+        """
+        Get the rotation entry that follows the live one.
+
+        Args:
+            mode (str): Payload key such as "ranked", "battle_royale" or "ltm"
+
+        Returns:
+            dict: The upcoming entry, or None if unknown
+        """
+        return self._entries(mode)[1]
+
+    def remaining_secs(self, mode):
+        """
+        Seconds until the live rotation for a mode ends.
+
+        Args:
+            mode (str): Payload key such as "ranked", "battle_royale" or "ltm"
+
+        Returns:
+            int: Seconds remaining, or None if unknown
+        """
+        current = self.current(mode)
+        if current is None or current['end'] is None:
+            return None
+        return max(0, int(current['end'] - time.time()))
+
+    def next_boundary(self):
+        """
+        Epoch seconds of the soonest rotation change across all modes.
+
+        Returns:
+            float: Timestamp of the next boundary, or None if no timings are known
+        """
+        boundaries = [current['end'] for current, _ in self.modes.values()]
+        return min(boundaries) if boundaries else None
@@ -1,12 +1,13 @@
 """
 Periodic tasks for the WayPoint Discord bot using discord.ext.tasks.
 """
+import asyncio
 import discord
 from discord.ext import tasks
 from datetime import datetime, time
-from config import TIMEZONE_ET
-from api import get_player_game_async
-from embeds import create_player_stats_embed, create_server_status_embed
+from config import TIMEZONE_ET, BACKUP_INTERVAL_HOURS, STATS_UPDATE_CONCURRENCY, STATS_UPDATE_TIMEOUT
+from embeds import create_player_stats_embed, create_server_status_embed, embed_fingerprint
+from ratelimit import PRIORITY_BACKGROUND
 from utils import check_cpu_temp
 
 
@@ -14,6 +15,7 @@ from utils import check_cpu_temp
 bot = None
 db = None
 api = None
+edits = None
 
 test_id=
 
@@ -63,62 +65,105 @@ async def thermal_throttle_alert_error_handler(error):
     """Handle errors in the thermal throttle alert task."""
     print(f"❌ Thermal throttle alert task error: {error}")
 
+@tasks.loop(time=time(hour=4, minute=0, tzinfo=TIMEZONE_ET))
+async def downsample_rp_history():
+    """Thin out old RP history once a day."""
+    await db.downsample_rp_snapshots()
+
+
+@downsample_rp_history.before_loop
+async def before_downsample_rp_history():
+    await bot.wait_until_ready()
+
+
+@downsample_rp_history.error
+async def downsample_rp_history_error_handler(error):
+    """Handle errors in the RP history downsampling task."""
+    print(f"❌ RP history downsampling task error: {error}")
+
+
+@tasks.loop(hours=BACKUP_INTERVAL_HOURS)
+async def backup_database():
+    """Take a scheduled online backup of the database."""
+    await db.backup()
+
+
+@backup_database.before_loop
+async def before_backup_database():
+    await bot.wait_until_ready()
+
+
+@backup_database.error
+async def backup_database_error_handler(error):
+    """Handle errors in the database backup task."""
+    print(f"❌ Database backup task error: {error}")
+
+
+async def update_player_stats_messages(apex_uid, platform, memberships, formatted_time):
+    """
+    Render one player's stats embed and queue it for every guild's message.
+    
+    Args:
+        apex_uid (str): Apex Legends UID
+        platform (str): Gaming platform (PC, PS4, X1)
+        memberships (list): Membership records showing this player
+        formatted_time (str): Formatted timestamp string
+    """
+    # Create updated embed once and reuse it for every guild
+    try:
+        updated_embed = await create_player_stats_embed(platform, apex_uid, formatted_time, api, PRIORITY_BACKGROUND)
+    except Exception as e:
+        print(f"❌ Failed to create stats embed for player {apex_uid}: {e}")
+        return
+    fingerprint = embed_fingerprint(updated_embed)
+    
+    for membership in memberships:
+        # The edit queue skips unchanged content, then paces and coalesces the actual Discord edits
+        edits.submit(
+            membership.stats_channel_id,
+            membership.stats_message_id,
+            updated_embed,
+            fingerprint,
+            label=f"stats message for user {membership.discord_id} in server {membership.discord_server_id}"
+        )
+
+
+async def _bounded_player_update(semaphore, apex_uid, platform, memberships, formatted_time):
+    """Run one player's update under the concurrency limit and timeout, containing any failure."""
+    async with semaphore:
+        try:
+            await asyncio.wait_for(
+                update_player_stats_messages(apex_uid, platform, memberships, formatted_time),
+                timeout=STATS_UPDATE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"⏱️ Stats update for player {apex_uid} timed out after {STATS_UPDATE_TIMEOUT}s")
+        except Exception as e:
+            print(f"❌ Stats update for player {apex_uid} failed: {e}")
+
+
 @tasks.loop(minutes=1)
 async def update_stats_periodically():
     """Update player stats embeds every minute."""
     try:
-        await api.fetch_all_data()  # Re-fetch API data
+        await api.fetch_all_data(PRIORITY_BACKGROUND)  # Re-fetch API data
         
-        users = await db.get_all_users()
-
-        for user in users:
-            # Handle multiple schema versions safely by index mapping
-            # Expected columns: discord_id, discord_server_id, apex_uid, platform, current_RP,
-            # time_registered, stats_message_id, stats_channel_id, steam_id, session_start_RP, session_start_time, is_in_game
-            discord_id = user[0]
-            discord_server_id = user[1] if len(user) > 1 else None
-            apex_uid = user[2] if len(user) > 2 else None
-            platform = user[3] if len(user) > 3 else None
-            current_RP = user[4] if len(user) > 4 else None
-            time_registered = user[5] if len(user) > 5 else None
-            stats_message_id = user[6] if len(user) > 6 else None
-            stats_channel_id = user[7] if len(user) > 7 else None
-            
-            # Skip if no message ID set
-            if not stats_message_id or not stats_channel_id:
-                continue
-            
-            # Fetch the channel
-            channel = bot.get_channel(stats_channel_id)
-            if channel is None:
-                print(f"❌ Could not find channel ID {stats_channel_id} for user {discord_id}")
-                continue
-            
-            # Fetch the message
-            try:
-                message = await channel.fetch_message(stats_message_id)
-            except discord.NotFound:
-                print(f"❌ Could not find message ID {stats_message_id} in channel ID {stats_channel_id} for user {discord_id}")
-                continue
-            
-            # Create updated embed
-            now_et = datetime.now(TIMEZONE_ET)
-            formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
-            
-            try:
-                updated_embed = await create_player_stats_embed(platform, apex_uid, formatted_time, api)
-            except Exception as e:
-                print(f"❌ Failed to create stats embed for user {discord_id}: {e}")
-                continue
-            
-            # Edit the message
-            try:
-                await message.edit(embed=updated_embed)
-                print(f"✅ Updated stats message for user {discord_id}")
-            except discord.Forbidden:
-                print(f"❌ Bot lacks permissions to edit message ID {stats_message_id} in channel ID {stats_channel_id} for user {discord_id}")
-            except discord.HTTPException as e:
-                print(f"❌ Failed to edit stats message for user {discord_id}: {e}")
+        # Group stats messages by player so each player is fetched once per tick
+        targets = db.get_stats_message_targets()
+        
+        now_et = datetime.now(TIMEZONE_ET)
+        formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
+        
+        # Players are updated concurrently so a tick takes about as long as the
+        # slowest player rather than the sum of all of them
+        started = asyncio.get_running_loop().time()
+        semaphore = asyncio.Semaphore(STATS_UPDATE_CONCURRENCY)
+        await asyncio.gather(*(
+            _bounded_player_update(semaphore, apex_uid, platform, memberships, formatted_time)
+            for (apex_uid, platform), memberships in targets.items()
+        ))
+        if targets:
+            print(f"⚡ Stats tick: {len(targets)} players in {asyncio.get_running_loop().time() - started:.1f}s")
     
     except Exception as e:
         print(f"❌ Error in update_stats_periodically: {e}")
@@ -140,44 +185,46 @@ async def stats_error_handler(error):
 async def update_server_stats_periodically():
     """Update server status embeds every 5 minutes."""
     try:
-        await api.fetch_all_data()  # Re-fetch API data
+        await api.fetch_all_data(PRIORITY_BACKGROUND)  # Re-fetch API data
+        
+        # Log limiter health alongside each server status pass
+        metrics = api.limiter.metrics()
+        lanes = metrics["lanes"]
+        print(
+            f"📊 API limiter: {metrics['rate']:.2f} req/s, throttled {metrics['throttled']}x, "
+            f"interactive {lanes['interactive']['queued']} queued (max wait {lanes['interactive']['max_wait']:.1f}s), "
+            f"background {lanes['background']['queued']} queued (max wait {lanes['background']['max_wait']:.1f}s)"
+        )
+        queue = edits.metrics()
+        print(
+            f"📊 Edit queue: {queue['queued']} queued (max {queue['max_queued']}) across {queue['channels']} channels, "
+            f"{queue['sent']} sent, {queue['coalesced']} coalesced, {queue['skipped']} unchanged, {queue['failed']} failed, throttled {queue['throttled']}x"
+        )
+        
+        servers = db.get_servers_with_status_message()
+        if not servers:
+            return
         
-        servers = await db.get_all_servers()
+        # The status embed is the same for every guild, so render it once per tick
+        now_et = datetime.now(TIMEZONE_ET)
+        formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
         
+        updated_embed = create_server_status_embed(formatted_time, api)
+        fingerprint = embed_fingerprint(updated_embed)
+        
+        # Queue every guild's edit; the edit queue sends them concurrently across channels
+        queued = 0
         for server in servers:
-            discord_server_id, apex_server_channel_id, apex_server_message_id = server
-            
-            # Skip if no message ID set
-            if not apex_server_channel_id or not apex_server_message_id:
-                continue
-            
-            # Fetch the channel
-            channel = bot.get_channel(apex_server_channel_id)
-            if channel is None:
-                print(f"❌ Could not find channel ID {apex_server_channel_id} for server {discord_server_id}")
-                continue
-            
-            # Fetch the message
-            try:
-                message = await channel.fetch_message(apex_server_message_id)
-            except discord.NotFound:
-                print(f"❌ Could not find message ID {apex_server_message_id} in channel ID {apex_server_channel_id} for server {discord_server_id}")
-                continue
-            
-            # Create updated embed
-            now_et = datetime.now(TIMEZONE_ET)
-            formatted_time = now_et.strftime("%m/%d/%Y %I:%M %p").lstrip("0")
-            
-            updated_embed = create_server_status_embed(formatted_time, api)
-            
-            # Edit the message
-            try:
-                await message.edit(embed=updated_embed)
-                print(f"✅ Updated server status message for server {discord_server_id}")
-            except discord.Forbidden:
-                print(f"❌ Bot lacks permissions to edit message ID {apex_server_message_id} in channel ID {apex_server_channel_id} for server {discord_server_id}")
-            except discord.HTTPException as e:
-                print(f"❌ Failed to edit server status message for server {discord_server_id}: {e}")
+            # Unchanged messages are skipped by the edit queue
+            if edits.submit(
+                server.apex_server_channel_id,
+                server.apex_server_message_id,
+                updated_embed,
+                fingerprint,
+                label=f"server status message for server {server.discord_server_id}"
+            ):
+                queued += 1
+        print(f"⚡ Server status tick: {queued} of {len(servers)} servers queued for edit")
     
     except Exception as e:
         print(f"❌ Error in update_server_stats_periodically: {e}")
@@ -201,29 +248,33 @@ async def apex_play_monitor():
     record their RP. When they stop playing, send a DM summarizing RP change.
     """
     try:
-        users = await db.get_all_users()
-        for user in users:
-            # Map fields safely (see update_stats_periodically)
-            discord_id = user[0]
-            apex_uid = user[2] if len(user) > 2 else None
-            platform = user[3] if len(user) > 3 else None
-            current_RP = user[4] if len(user) > 4 else None
-            time_registered = user[5] if len(user) > 5 else None
-            steam_id = user[8] if len(user) > 8 else None
-            session_start_RP = user[9] if len(user) > 9 else None
-            session_start_time = user[10] if len(user) > 10 else None
-            is_in_game = bool(user[11]) if len(user) > 11 and user[11] is not None else False
-
-            # Need a Steam ID to check game; skip otherwise
-            if not steam_id:
-                continue
+        users = db.get_users_with_steam_id()
+
+        # Look up every linked Steam account in as few batched calls as possible
+        steam_ids = [user.steam_id for user in users]
+        if not steam_ids:
+            return
+        try:
+            games = await api.get_player_games_async(steam_ids)
+        except Exception as e:
+            print(f"❌ Failed to get Steam games: {e}")
+            return
 
-            # Check current Steam game
-            try:
-                gameid = await get_player_game_async(steam_id)
-            except Exception as e:
-                print(f"❌ Failed to get Steam game for {steam_id}: {e}")
+        for user in users:
+            discord_id = user.discord_id
+            apex_uid = user.apex_uid
+            platform = user.platform
+            current_RP = user.current_RP
+            steam_id = user.steam_id
+            session_start_RP = user.session_start_RP
+            session_start_time = user.session_start_time
+            is_in_game = user.is_in_game
+
+            # Skip players whose Steam batch failed; their state is unknown
+            if str(steam_id) not in games:
+                print(f"❌ Failed to get Steam game for {steam_id}")
                 continue
+            gameid = games[str(steam_id)]
 
             # Normalize comparison
             if gameid is not None and str(gameid) == '1172470':
@@ -231,8 +282,8 @@ async def apex_play_monitor():
                 if not is_in_game:
                     # Starting session; fetch current RP and record start
                     try:
-                        player_data = await api.fetch_player_stats(apex_uid, platform)
-                        rp = player_data['global']['rank']['rankScore']
+                        player = await api.fetch_player_stats(apex_uid, platform, PRIORITY_BACKGROUND)
+                        rp = player.rank_score
                     except Exception as e:
                         print(f"❌ Failed to fetch RP for {apex_uid}: {e}")
                         continue
@@ -247,8 +298,8 @@ async def apex_play_monitor():
                 # Player not in Apex. If they were in-game, end session and notify
                 if is_in_game:
                     try:
-                        player_data = await api.fetch_player_stats(apex_uid, platform)
-                        final_rp = player_data['global']['rank']['rankScore']
+                        player = await api.fetch_player_stats(apex_uid, platform, PRIORITY_BACKGROUND)
+                        final_rp = player.rank_score
                     except Exception as e:
                         print(f"❌ Failed to fetch final RP for {apex_uid}: {e}")
                         final_rp = current_RP if current_RP is not None else 0
@@ -299,6 +350,9 @@ async def apex_play_monitor():
                     except Exception as e:
                         print(f"❌ Failed to send DM to {discord_id}: {e}")
 
+        # Commit this tick's session changes in one transaction
+        await db.flush()
+
     except Exception as e:
         print(f"❌ Error in apex_play_monitor: {e}")
 
@@ -313,7 +367,7 @@ async def apex_play_monitor_error_handler(error):
     print(f"❌ Apex play monitor task error: {error}")
 
 
-def setup_tasks(bot_instance, db_instance, api_instance):
+def setup_tasks(bot_instance, db_instance, api_instance, edits_instance):
     """
     Initialize and start all periodic tasks.
     
@@ -321,11 +375,13 @@ def setup_tasks(bot_instance, db_instance, api_instance):
         bot_instance: The Discord bot instance
         db_instance: The Database instance
         api_instance: The API instance
+        edits_instance: The EditQueue instance
     """
-    global bot, db, api
+    global bot, db, api, edits
     bot = bot_instance
     db = db_instance
     api = api_instance
+    edits = edits_instance
     
     # Start tasks if not already running
     if not update_stats_periodically.is_running():
@@ -343,6 +399,14 @@ def setup_tasks(bot_instance, db_instance, api_instance):
     if not thermal_throttle_check.is_running():
         thermal_throttle_check.start()
         print("✅ Started thermal throttle check task")
+
+    if not downsample_rp_history.is_running():
+        downsample_rp_history.start()
+        print("✅ Started RP history downsampling task")
+    
+    if not backup_database.is_running():
+        backup_database.start()
+        print("✅ Started database backup task")
     
     try:
         if not apex_play_monitor.is_running():
@@ -56,3 +56,21 @@ def format_rp_per_hour(rp_change, start_time, end_time):
         return "0.0 RP/hr"
 
     return f"{rp_per_hour:+.1f} RP/hr"
+
+
+def format_age(seconds):
+    """
+    Format an age in seconds as a short string.
+
+    Args:
+        seconds (float): Age in seconds
+
+    Returns:
+        str: Compact age such as "45s", "12m" or "3h"
+    """
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h"